@@ -6,13 +6,17 @@
 
 from django import forms
 from django.contrib import admin
+from django.contrib.admin.views.main import SEARCH_VAR, ORDER_VAR
+from django.db.models import Prefetch
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 
 from inventory.apps.items.models import (
-    Manufacturer, Distributor, Category, Currency, Cost, Specification, Item)
+    Manufacturer, Distributor, Category, Currency, Cost, Specification, Item,
+    ItemSearchIndex)
+from inventory.apps.maintenance.models import LocationCodeCategory
 from inventory.apps.regions.models import Region, Country
-from inventory.apps.utils.admin import BaseAdmin
+from inventory.apps.utils.admin import BaseAdmin, TreeAdmin
 from inventory.setupenv import getLogger
 
 log = getLogger()
@@ -207,7 +211,7 @@ class ManufacturerAdmin(BaseAdmin):
 admin.site.register(Manufacturer, ManufacturerAdmin)
 
 
-class CategoryAdmin(BaseAdmin):
+class CategoryAdmin(TreeAdmin):
     list_display = ('name', '_parentsProducer', '_levelProducer',)
     search_fields = ('name',)
     ordering = ('path',)
@@ -243,6 +247,12 @@ class CostAdmin(BaseAdmin):
                      'item__categories__path', 'distributor__name',
                      'manufacturer__name', 'date_acquired')
     ordering = ('item__title', 'invoice_number', 'date_acquired')
+    list_select_related = ('item', 'currency', 'distributor', 'manufacturer')
+
+    def get_queryset(self, request):
+        categories = Category.objects.only('pk', 'path')
+        return super().get_queryset(request).prefetch_related(
+            Prefetch('item__categories', queryset=categories))
 
     def display_item_title(self, obj):
         return obj.item.title if obj.item else "-"
@@ -256,16 +266,9 @@ class CostAdmin(BaseAdmin):
         if not obj or not obj.item:
             return "-"
 
-        # Get the list of category objects
-        categories = obj.item.categories.all()
-
-        if not categories.exists():
-            return "-"
-
-        # Extract the 'path' (or name) from each and join them
-        # Assuming 'path' is the field you want to show
-        category_paths = [cat.path for cat in categories]
-        return ", ".join(category_paths)
+        # The categories are prefetched with the page.
+        category_paths = [cat.path for cat in obj.item.categories.all()]
+        return ", ".join(category_paths) or "-"
     categories.short_description = "Categories"
     categories.admin_order_field = 'item__categories__path'
 
@@ -329,6 +332,36 @@ class ItemAdmin(BaseAdmin):
     class Media:
         css = {'all': ('css/hozFilter.css',)}
 
+    def get_queryset(self, request):
+        """
+        Load everything the list display producers need with the page, one
+        query for the items and one each for their categories and location
+        codes.
+        """
+        queryset = super().get_queryset(request).prefetch_related(
+            Prefetch('categories',
+                     queryset=Category.objects.only('pk', 'path')),
+            Prefetch('location_code',
+                     queryset=LocationCodeCategory.objects.only('pk', 'path')))
+        return Item.withFirstAcquired(queryset)
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Search the full text index instead of a LIKE on every field in
+        search_fields, the fields are kept so that the search box is shown.
+        """
+        if not search_term:
+            return queryset, False
+
+        return ItemSearchIndex.search(search_term, queryset), False
+
+    def get_ordering(self, request):
+        # Show the best matches first unless a column was clicked.
+        if request.GET.get(SEARCH_VAR) and ORDER_VAR not in request.GET:
+            return ('-search_rank',)
+
+        return super().get_ordering(request)
+
     def save_formset(self, request, form, formset, change):
         formset.save(commit=False)
 
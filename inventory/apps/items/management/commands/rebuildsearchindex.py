@@ -0,0 +1,20 @@
+#
+# items/management/commands/rebuildsearchindex.py
+#
+# Rebuilds the full text search documents and the part number index of
+# every item, use it after a bulk import that bypassed the model signals.
+#
+
+from django.core.management.base import BaseCommand
+
+from inventory.apps.items.models import Item, ItemSearchIndex, ItemPartNumber
+
+
+class Command(BaseCommand):
+    help = ("Rebuild the full text search and part number indexes of the "
+            "items.")
+
+    def handle(self, *args, **options):
+        ItemSearchIndex.rebuild()
+        ItemPartNumber.rebuild()
+        self.stdout.write(f"Indexed {Item.objects.count()} items.")
@@ -0,0 +1,45 @@
+# Generated by Django 6.0.4 on 2026-10-18 17:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_closure(apps, schema_editor):
+    Category = apps.get_model('items', 'Category')
+    CategoryClosure = apps.get_model('items', 'CategoryClosure')
+    parents = dict(Category.objects.values_list('pk', 'parent_id'))
+    links = []
+
+    for pk in parents:
+        ancestor_id, depth = pk, 0
+
+        while ancestor_id in parents and depth <= 100:
+            links.append(CategoryClosure(ancestor_id=ancestor_id,
+                                         descendant_id=pk, depth=depth))
+            ancestor_id, depth = parents[ancestor_id], depth + 1
+
+    CategoryClosure.objects.bulk_create(links, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0003_alter_cost_invoice_number'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField(default=0)),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='items.category')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='items.category')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['descendant', 'depth'], name='items_categ_descend_36beac_idx')],
+                'unique_together': {('ancestor', 'descendant')},
+            },
+        ),
+        migrations.RunPython(populate_closure, migrations.RunPython.noop),
+    ]
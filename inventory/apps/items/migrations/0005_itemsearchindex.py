@@ -0,0 +1,60 @@
+# Generated by Django 6.0.4 on 2026-10-18 17:27
+
+import django.db.models.deletion
+import inventory.apps.utils.fulltext
+from django.db import migrations, models
+
+
+def populate_index(apps, schema_editor):
+    Item = apps.get_model('items', 'Item')
+    ItemSearchIndex = apps.get_model('items', 'ItemSearchIndex')
+    items = Item.objects.select_related(
+        'distributor', 'manufacturer').prefetch_related(
+        'categories', 'cost_set', 'specification_set').order_by('pk')
+    records = []
+
+    for item in items.iterator(chunk_size=500):
+        parts = [item.title, item.item_number, item.item_number_mfg,
+                 item.item_number_dst, item.package, item.notes]
+        parts += [cat.path for cat in item.categories.all()]
+        parts += [cost.invoice_number for cost in item.cost_set.all()]
+        parts += [f"{spec.name} {spec.value}"
+                  for spec in item.specification_set.all()]
+        parts += [business.name for business in (item.distributor,
+                                                 item.manufacturer)
+                  if business]
+        records.append(ItemSearchIndex(
+            item=item, document='\n'.join(part for part in parts if part)))
+
+    ItemSearchIndex.objects.bulk_create(records, batch_size=500)
+
+
+def create_index(apps, schema_editor):
+    ItemSearchIndex = apps.get_model('items', 'ItemSearchIndex')
+    inventory.apps.utils.fulltext.createIndex(
+        schema_editor, ItemSearchIndex, 'document')
+
+
+def drop_index(apps, schema_editor):
+    ItemSearchIndex = apps.get_model('items', 'ItemSearchIndex')
+    inventory.apps.utils.fulltext.dropIndex(
+        schema_editor, ItemSearchIndex, 'document')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0004_categoryclosure'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemSearchIndex',
+            fields=[
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_index', serialize=False, to='items.item')),
+                ('document', inventory.apps.utils.fulltext.FullTextField(blank=True, default='')),
+            ],
+        ),
+        migrations.RunPython(populate_index, migrations.RunPython.noop),
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 6.0.4 on 2026-10-18 17:30
+
+import django.db.models.deletion
+import inventory.apps.utils.partnumber
+from django.db import migrations, models
+
+
+def populate_index(apps, schema_editor):
+    Item = apps.get_model('items', 'Item')
+    ItemPartNumber = apps.get_model('items', 'ItemPartNumber')
+    fields = ('item_number', 'item_number_mfg', 'item_number_dst')
+    records = []
+
+    for item in Item.objects.only(*fields).order_by('pk').iterator(
+            chunk_size=500):
+        for code, name in enumerate(fields):
+            for suffix in inventory.apps.utils.partnumber.suffixes(
+                    getattr(item, name)):
+                records.append(ItemPartNumber(
+                    item=item, field=code, suffix=suffix,
+                    trigram=suffix[:3]))
+
+    ItemPartNumber.objects.bulk_create(records, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0005_itemsearchindex'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='item',
+            name='item_number',
+            field=inventory.apps.utils.partnumber.PartNumberField(db_index=True, index='items.ItemPartNumber', max_length=50, verbose_name='Item Number'),
+        ),
+        migrations.AlterField(
+            model_name='item',
+            name='item_number_dst',
+            field=inventory.apps.utils.partnumber.PartNumberField(blank=True, db_index=True, index='items.ItemPartNumber', max_length=50, null=True, verbose_name='Distributor Item Number'),
+        ),
+        migrations.AlterField(
+            model_name='item',
+            name='item_number_mfg',
+            field=inventory.apps.utils.partnumber.PartNumberField(blank=True, db_index=True, index='items.ItemPartNumber', max_length=50, null=True, verbose_name='Manufacturer Item Number'),
+        ),
+        migrations.CreateModel(
+            name='ItemPartNumber',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.SmallIntegerField()),
+                ('suffix', models.CharField(max_length=50)),
+                ('trigram', models.CharField(max_length=3)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='part_numbers', to='items.item')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['suffix', 'field'], name='items_partnumber_suffix'), models.Index(fields=['trigram', 'field'], name='items_partnumber_trigram')],
+            },
+        ),
+        migrations.RunPython(populate_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 6.0.4 on 2026-10-18 17:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+from inventory.apps.utils.utilities import parseMeasurement
+
+
+def populate_value_number(apps, schema_editor):
+    Specification = apps.get_model('items', 'Specification')
+    records = []
+
+    for spec in Specification.objects.only('value').iterator(chunk_size=500):
+        number = parseMeasurement(spec.value)
+
+        if number is not None and abs(number) < 10 ** 12:
+            spec.value_number = number
+            records.append(spec)
+
+    Specification.objects.bulk_update(records, ['value_number'],
+                                      batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0006_itempartnumber'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='specification',
+            name='value_number',
+            field=models.DecimalField(blank=True, decimal_places=12, editable=False, help_text='The value in its base unit if it is a measurement.', max_digits=24, null=True, verbose_name='Numeric Value'),
+        ),
+        migrations.AddIndex(
+            model_name='specification',
+            index=models.Index(fields=['name', 'value'], name='items_spec_name_value'),
+        ),
+        migrations.AddIndex(
+            model_name='specification',
+            index=models.Index(fields=['name', 'value_number'], name='items_spec_name_number'),
+        ),
+        migrations.RunPython(populate_value_number,
+                             migrations.RunPython.noop),
+    ]
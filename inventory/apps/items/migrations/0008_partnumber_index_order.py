@@ -0,0 +1,29 @@
+# Generated by Django 6.0.4 on 2026-10-18 17:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0007_specification_value_number'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='itempartnumber',
+            name='items_partnumber_suffix',
+        ),
+        migrations.RemoveIndex(
+            model_name='itempartnumber',
+            name='items_partnumber_trigram',
+        ),
+        migrations.AddIndex(
+            model_name='itempartnumber',
+            index=models.Index(fields=['field', 'suffix'], name='items_partnumber_suffix'),
+        ),
+        migrations.AddIndex(
+            model_name='itempartnumber',
+            index=models.Index(fields=['field', 'trigram'], name='items_partnumber_trigram'),
+        ),
+    ]
@@ -4,20 +4,27 @@
 # Inventory model
 #
 
-from django.db import models
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models.signals import (
+    pre_save, post_save, post_delete, m2m_changed)
+from django.db.models.functions import Lower, Trim
+from django.db.models.lookups import Exact
 from django.utils.translation import gettext_lazy as _
 from django.utils.safestring import mark_safe
 
 from inventory.settings import CONDITION_TYPES
-from inventory.apps.utils.models import Base
+from inventory.common.caching import (
+    ProcessCache, TaggedCache, searchChoicesCache)
+from inventory.apps.utils.models import Base, TreeMixin, PendingUpdates
+from inventory.apps.utils.fulltext import FullTextField, FullTextRank
+from inventory.apps.utils.partnumber import PartNumberField, PartNumberIndex
+from inventory.apps.utils.utilities import parseMeasurement
 from inventory.apps.regions.models import Country, Region
 from inventory.apps.maintenance.models import LocationCodeCategory
 
 
-def cmp(a, b):
-    return (a > b) - (a < b)
-
-
 class BaseBusiness(Base):
     name = models.CharField(max_length=248, db_index=True)
     address_01 = models.CharField(max_length=50, blank=True, null=True)
@@ -55,7 +62,8 @@ class Manufacturer(BaseBusiness):
         ordering = ('name',)
 
 
-class Category(Base):
+class Category(TreeMixin, Base):
+    _PATH_FIELD = 'name'
     parent = models.ForeignKey("self", blank=True, null=True,
                                default=0, related_name='children',
                                on_delete=models.CASCADE)
@@ -75,23 +83,6 @@ class Category(Base):
         return Category.getSeparator().join([parent.name
                                              for parent in parents])
 
-    @classmethod
-    def getParents(self, category):
-        parents = Category._recurseParents(category)
-        parents.reverse()
-        return parents
-
-    @classmethod
-    def _recurseParents(self, category):
-        parents = []
-
-        if category.parent_id:
-            parents.append(category.parent)
-            more = Category._recurseParents(category.parent)
-            parents.extend(more)
-
-        return parents
-
     def _levelProducer(self):
         path = self._getCategoryPath()
         return path.count(Category.getSeparator())
@@ -101,26 +92,26 @@ class Category(Base):
         return self._getCategoryPath(current=False)
     _parentsProducer.short_description = _("Category Parents")
 
+    def _getPathSeparator(self):
+        return Category.getSeparator()
+
     def save(self, *args, **kwargs):
         old_parent_id = None
+        created = self.pk is None
 
         if self.pk:
             old_parent_id = type(self).objects.filter(pk=self.pk).values_list(
                 "parent_id", flat=True).first()
 
-        # Update self
-        self.path = self._getCategoryPath()
-        super().save(*args, **kwargs)
-
-        # Only cascade if parent changed
-        if old_parent_id != self.parent_id:
-            self._update_descendants()
+        with transaction.atomic():
+            # Update self
+            self.path = self._getCategoryPath()
+            super().save(*args, **kwargs)
 
-    def _update_descendants(self):
-        for child in self.children.all():
-            child.path = child._getCategoryPath()
-            child.save(update_fields=["path"])  # avoids full save side-effects
-            child._update_descendants()
+            # Only cascade if parent changed
+            if created or old_parent_id != self.parent_id:
+                self._update_descendants()
+                self._updateClosure(created)
 
     def getChildren(self):
         """
@@ -146,22 +137,13 @@ class Category(Base):
 
         NOT USED
         """
-        tree = []
-
-        for cat in categories:
-            iterator = cat.children.iterator()
+        links = CategoryClosure.objects.filter(ancestor__in=categories)
 
-            if withRoot:
-                tree.append(cat)
+        if not withRoot:
+            links = links.exclude(depth=0)
 
-            try:
-                while True:
-                    tree.append(iterator.next())
-            except StopIteration:
-                pass
-
-        return sorted(tree,
-                      cmp=lambda x, y: cmp(x.path.lower(), y.path.lower()))
+        return list(Category.objects.filter(
+            pk__in=links.values('descendant_id')).order_by(Lower('path')))
 
     @classmethod
     def getAllChildPathsForCategoryList(self, categoryList):
@@ -176,13 +158,80 @@ class Category(Base):
 
         if isinstance(categoryList, (list, tuple)):
             if categoryList:
-                argList = [f"models.Q(path__exact='{c}')"
-                           for c in categoryList]
-                args = eval(('|'.join(argList)))
-                result = Category.objects.filter(args)
+                paths = [str(c) for c in categoryList]
+                result = Category.objects.filter(
+                    ancestor_links__ancestor__path__in=paths).distinct()
 
         return result
 
+    def getTreeItems(self):
+        """
+        Return the items in this category and all its descendants.
+        """
+        descendants = CategoryClosure.objects.filter(
+            ancestor_id=self.pk).values('descendant_id')
+        return Item.objects.filter(
+            categories__in=descendants).distinct().order_by('title')
+
+    def _updateClosure(self, created):
+        """
+        Keep the CategoryClosure rows in step with this category's place in
+        the tree. When moved, the links from the old ancestors to the whole
+        subtree are replaced with links to the new ancestors.
+        """
+        if created:
+            subtree = [(self.pk, 0)]
+        else:
+            subtree = list(CategoryClosure.objects.filter(
+                ancestor_id=self.pk).values_list('descendant_id', 'depth'))
+            subtreeIds = [pk for pk, depth in subtree]
+
+            for idx in range(0, len(subtreeIds), self._BATCH_SIZE):
+                batch = subtreeIds[idx:idx + self._BATCH_SIZE]
+                stale = list(CategoryClosure.objects.filter(
+                    descendant_id__in=batch).exclude(
+                        ancestor_id__in=subtreeIds).values_list(
+                            'pk', flat=True))
+                CategoryClosure.objects.filter(pk__in=stale).delete()
+
+        links = [CategoryClosure(ancestor_id=self.pk, descendant_id=self.pk,
+                                 depth=0)] if created else []
+
+        if self.parent_id:
+            ancestors = CategoryClosure.objects.filter(
+                descendant_id=self.parent_id).values_list(
+                    'ancestor_id', 'depth')
+            links.extend(
+                CategoryClosure(ancestor_id=ancestorId,
+                                descendant_id=descendantId,
+                                depth=ancestorDepth + descendantDepth + 1)
+                for ancestorId, ancestorDepth in ancestors
+                for descendantId, descendantDepth in subtree)
+
+        CategoryClosure.objects.bulk_create(links,
+                                            batch_size=self._BATCH_SIZE)
+
+    @classmethod
+    def rebuildClosure(self):
+        """
+        Rebuild the whole CategoryClosure table from the parent links.
+        """
+        parents = dict(Category.objects.values_list('pk', 'parent_id'))
+        links = []
+
+        for pk in parents:
+            ancestorId, depth = pk, 0
+
+            while ancestorId in parents and depth <= self._MAX_DEPTH:
+                links.append(CategoryClosure(ancestor_id=ancestorId,
+                                             descendant_id=pk, depth=depth))
+                ancestorId, depth = parents[ancestorId], depth + 1
+
+        with transaction.atomic():
+            CategoryClosure.objects.all().delete()
+            CategoryClosure.objects.bulk_create(links,
+                                                batch_size=self._BATCH_SIZE)
+
     @classmethod
     def createCategoryTree(self, categoryList):
         """
@@ -243,7 +292,8 @@ class Category(Base):
     @classmethod
     def getAllRootTrees(self, name):
         result = []
-        records = Category.objects.filter(name=name)
+        records = Category.prefetchParents(
+            Category.objects.filter(name=name))
 
         if len(records) > 0:
             result[:] = [Category.getParents(record) for record in records]
@@ -258,6 +308,27 @@ class Category(Base):
         ordering = ('path',)
 
 
+class CategoryClosure(models.Model):
+    """
+    The transitive closure of the Category tree. There is a row for every
+    ancestor and descendant pair, including each category paired with
+    itself at depth 0. The rows are maintained by Category.save() and
+    removed by the cascade when either category is deleted.
+    """
+    ancestor = models.ForeignKey(Category, related_name='descendant_links',
+                                 on_delete=models.CASCADE)
+    descendant = models.ForeignKey(Category, related_name='ancestor_links',
+                                   on_delete=models.CASCADE)
+    depth = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.ancestor_id} > {self.descendant_id} ({self.depth})"
+
+    class Meta:
+        unique_together = ('ancestor', 'descendant',)
+        indexes = [models.Index(fields=('descendant', 'depth'))]
+
+
 class Currency(Base):
     symbol = models.CharField(max_length=1)
     currency = models.CharField(max_length=20)
@@ -292,7 +363,35 @@ class Cost(Base):
 class Specification(Base):
     name = models.CharField(max_length=248, blank=True, null=True)
     value = models.CharField(max_length=248, blank=True, null=True)
+    value_number = models.DecimalField(
+        max_digits=24, decimal_places=12, blank=True, null=True,
+        editable=False, verbose_name=_("Numeric Value"),
+        help_text=_("The value in its base unit if it is a measurement."))
     item = models.ForeignKey("Item", on_delete=models.CASCADE)
+    # The largest value_number that fits the column.
+    _MAX_NUMBER = Decimal('1e12')
+
+    @classmethod
+    def normalizeValue(self, value):
+        """
+        Return 'value' as a number in its base unit, e.g. '10k' is 10000,
+        or None if it is not a measurement.
+        """
+        number = parseMeasurement(value)
+
+        if number is not None and abs(number) >= self._MAX_NUMBER:
+            number = None
+
+        return number
+
+    def save(self, *args, **kwargs):
+        self.value_number = self.normalizeValue(self.value)
+        updateFields = kwargs.get('update_fields')
+
+        if updateFields is not None and 'value' in updateFields:
+            kwargs['update_fields'] = set(updateFields) | {'value_number'}
+
+        super().save(*args, **kwargs)
 
     def _displayItemTitle(self):
         return "%s" % self.item.title
@@ -303,17 +402,26 @@ class Specification(Base):
 
     class Meta:
         ordering = ('name',)
+        indexes = [
+            models.Index(fields=('name', 'value'),
+                         name='items_spec_name_value'),
+            models.Index(fields=('name', 'value_number'),
+                         name='items_spec_name_number'),
+            ]
 
 
 class Item(Base):
     title = models.CharField(max_length=248, verbose_name=_("Description"))
-    item_number = models.CharField(max_length=50, db_index=True,
-                                   verbose_name=_("Item Number"))
-    item_number_mfg = models.CharField(
+    item_number = PartNumberField(max_length=50, db_index=True,
+                                  index='items.ItemPartNumber',
+                                  verbose_name=_("Item Number"))
+    item_number_mfg = PartNumberField(
         max_length=50, db_index=True, blank=True, null=True,
+        index='items.ItemPartNumber',
         verbose_name=_("Manufacturer Item Number"))
-    item_number_dst = models.CharField(
+    item_number_dst = PartNumberField(
         max_length=50, db_index=True, blank=True, null=True,
+        index='items.ItemPartNumber',
         verbose_name=_("Distributor Item Number"))
     package = models.CharField(max_length=30, blank=True, null=True)
     condition = models.SmallIntegerField(choices=CONDITION_TYPES, default=0)
@@ -344,20 +452,408 @@ class Item(Base):
     _locationCodeProducer.short_description = _("Location Code")
 
     def _aquiredDateProducer(self):
-        result = "Unknown"
-        values = self.cost_set.values()
-
-        if values and len(values) > 0:
-            date = values[0]['date_acquired']
-
-            if date:
-                result = date
-
-        return result
+        # ItemAdmin annotates the date, see withFirstAcquired().
+        if hasattr(self, 'first_acquired'):
+            date = self.first_acquired
+        else:
+            dates = self.cost_set.filter(date_acquired__isnull=False)
+            date = dates.order_by('date_acquired').values_list(
+                'date_acquired', flat=True).first()
+
+        return date or "Unknown"
     _aquiredDateProducer.short_description = _("Date Aquired")
+    _aquiredDateProducer.admin_order_field = 'first_acquired'
+
+    @classmethod
+    def withFirstAcquired(self, queryset):
+        """
+        Annotate the items in 'queryset' with the earliest date any of their
+        costs were acquired as 'first_acquired'.
+        """
+        dates = Cost.objects.filter(
+            item=models.OuterRef('pk'), date_acquired__isnull=False).order_by(
+            'date_acquired').values('date_acquired')[:1]
+        return queryset.annotate(first_acquired=models.Subquery(dates))
 
     def __str__(self):
         return self.title
 
     class Meta:
         ordering = ('categories__path',)
+
+
+class ItemSearchIndex(models.Model):
+    """
+    One document per item holding all of its searchable text, kept in a
+    full text index so that a search does not need a LIKE on every column
+    and join. The documents are rebuilt after an item, its costs,
+    specifications or categories change, once per item when the
+    transaction commits.
+    """
+    item = models.OneToOneField(Item, primary_key=True,
+                                related_name='search_index',
+                                on_delete=models.CASCADE)
+    document = FullTextField(blank=True, default='')
+    _BATCH_SIZE = 500
+
+    @classmethod
+    def buildDocument(self, item):
+        """
+        Return the searchable text of an item, its costs, specifications
+        and categories should be prefetched.
+        """
+        parts = [item.title, item.item_number, item.item_number_mfg,
+                 item.item_number_dst, item.package, item.notes]
+        parts += [cat.path for cat in item.categories.all()]
+        parts += [cost.invoice_number for cost in item.cost_set.all()]
+        parts += [f"{spec.name} {spec.value}"
+                  for spec in item.specification_set.all()]
+
+        for business in (item.distributor, item.manufacturer):
+            if business:
+                parts.append(business.name)
+
+        return '\n'.join(part for part in parts if part)
+
+    @classmethod
+    def update(self, pks):
+        """
+        Rebuild the documents of the items with the primary keys in 'pks'.
+        """
+        pks = list(pks)
+
+        for idx in range(0, len(pks), self._BATCH_SIZE):
+            items = Item.objects.filter(
+                pk__in=pks[idx:idx + self._BATCH_SIZE]).select_related(
+                'distributor', 'manufacturer').prefetch_related(
+                models.Prefetch('categories',
+                                queryset=Category.objects.only('pk', 'path')),
+                models.Prefetch('cost_set', queryset=Cost.objects.only(
+                    'pk', 'item_id', 'invoice_number').order_by()),
+                'specification_set')
+            records = [self(item=item, document=self.buildDocument(item))
+                       for item in items]
+            self.objects.bulk_create(
+                records, update_conflicts=True, unique_fields=('item',),
+                update_fields=('document',))
+
+        # The documents are saved without signals.
+        TaggedCache.invalidateModels(self)
+
+    @classmethod
+    def rebuild(self):
+        """
+        Rebuild the documents of every item.
+        """
+        self.update(Item.objects.order_by('pk').values_list('pk', flat=True))
+
+    @classmethod
+    def scheduleUpdate(self, pks):
+        """
+        Rebuild the documents of the items with the primary keys in 'pks'
+        when the current transaction commits, an item changed many times
+        in one transaction is only rebuilt once.
+        """
+        PendingUpdates.add(self.update, pks)
+
+    @classmethod
+    def search(self, text, queryset=None):
+        """
+        Return the items that contain every word in 'text' with the best
+        matches first, each item has its 'search_rank'.
+
+        :param str text: The search text.
+        :param queryset: An optional Item queryset to search within.
+        """
+        if queryset is None:
+            queryset = Item.objects.all()
+
+        return queryset.filter(search_index__document__fulltext=text).annotate(
+            search_rank=FullTextRank(models.F('search_index__document'), text)
+            ).order_by('-search_rank', 'pk')
+
+    def __str__(self):
+        return str(self.item_id)
+
+
+class ItemPartNumber(PartNumberIndex):
+    """
+    The item numbers of every item by each of their suffixes, used by the
+    'partnumber' lookups on the item number fields.
+    """
+    FIELDS = ('item_number', 'item_number_mfg', 'item_number_dst')
+    item = models.ForeignKey(Item, related_name='part_numbers',
+                             on_delete=models.CASCADE)
+
+    class Meta:
+        indexes = [
+            # The field is always matched exactly so it leads, the suffix
+            # is then scanned as a range within it.
+            models.Index(fields=('field', 'suffix'),
+                         name='items_partnumber_suffix'),
+            models.Index(fields=('field', 'trigram'),
+                         name='items_partnumber_trigram'),
+            ]
+
+
+class SpecificationFacets:
+    """
+    Searches items by their specifications and counts how many items have
+    each specification value. The counts for all the items in a category,
+    including the categories below it, are cached until a specification
+    or the categories of an item change.
+    """
+    _CACHE = ProcessCache('specification-facets', maxSize=256)
+    RANGE_SEPARATOR = '..'
+
+    @classmethod
+    def specificationQuery(self, name, value):
+        """
+        Return a Q object on Specification matching 'value' of the
+        specification 'name'. A measurement is matched by its number so
+        '10k' matches '10000', 'low..high' matches a range of measurements
+        where either end may be left out and anything else is matched as
+        text ignoring case and surrounding spaces.
+
+        :raises ValueError: If an end of a range is not a measurement.
+        """
+        low, separator, high = value.partition(self.RANGE_SEPARATOR)
+
+        if separator:
+            query = models.Q(name=name, value_number__isnull=False)
+
+            for lookup, end in (('gte', low), ('lte', high)):
+                if end.strip():
+                    number = Specification.normalizeValue(end)
+
+                    if number is None:
+                        raise ValueError(
+                            f"Invalid range [{value}] for {name}.")
+
+                    query &= models.Q(**{f"value_number__{lookup}": number})
+
+            return query
+
+        number = Specification.normalizeValue(value)
+
+        if number is not None:
+            return models.Q(name=name, value_number=number)
+
+        # The same text countFacets() groups the values by.
+        text = Exact(Lower(Trim('value')), value.strip().lower())
+        return models.Q(name=name) & models.Q(text)
+
+    @classmethod
+    def itemsInCategory(self, category, queryset=None):
+        """
+        Return the items in the category with primary key 'category' or in
+        any category below it, all items if 'category' is None.
+        """
+        if queryset is None:
+            queryset = Item.objects.all()
+
+        if category is None:
+            return queryset
+
+        descendants = CategoryClosure.objects.filter(
+            ancestor_id=category).values('descendant_id')
+        return queryset.filter(pk__in=Item.categories.through.objects.filter(
+            category_id__in=descendants).values('item_id'))
+
+    @classmethod
+    def search(self, filters, category=None, queryset=None):
+        """
+        Return the items that have every specification value in 'filters'.
+
+        :param dict filters: Values keyed by specification name, see
+                             specificationQuery().
+        :param int category: Optional primary key of a category to search
+                             within.
+        :param queryset: An optional Item queryset to search within.
+        """
+        queryset = self.itemsInCategory(category, queryset)
+
+        for name, value in filters.items():
+            specs = Specification.objects.filter(
+                self.specificationQuery(name, value),
+                item=models.OuterRef('pk'))
+            queryset = queryset.filter(models.Exists(specs))
+
+        return queryset
+
+    @classmethod
+    def countFacets(self, items):
+        """
+        Count the 'items' that have each specification value.
+
+        :returns: A dict keyed by specification name of lists of dicts with
+                  the 'value', its 'number' as a string or None and the
+                  'count', the most common value first. Values with the
+                  same number such as '10k' and '10000' are counted as
+                  one, an item with both is only counted once.
+        """
+        # Measurements are grouped by their number, anything else by its
+        # text ignoring case.
+        text = models.Case(
+            models.When(value_number__isnull=True,
+                        then=Lower(Trim('value'))),
+            default=models.Value(''))
+        rows = Specification.objects.filter(
+            item__in=items.order_by().values('pk'), name__gt='',
+            value__gt='').annotate(text=text).values(
+            'name', 'value_number', 'text').annotate(
+            count=models.Count('item', distinct=True),
+            label=models.Min(Trim('value'))).order_by()
+        facets = {}
+
+        for row in rows:
+            number = row['value_number']
+            facets.setdefault(row['name'], []).append({
+                'value': row['label'], 'count': row['count'],
+                'number': (None if number is None
+                           else format(number.normalize(), 'f'))})
+
+        return {name: sorted(facets[name],
+                             key=lambda facet: (-facet['count'],
+                                                facet['value']))
+                for name in sorted(facets)}
+
+    @classmethod
+    def getFacets(self, category=None):
+        """
+        Return the cached facet counts of the items in the category with
+        primary key 'category' and the categories below it, all items if
+        'category' is None. See countFacets().
+        """
+        return self._CACHE.getOrSet(category, lambda: self.countFacets(
+            self.itemsInCategory(category)))
+
+    @classmethod
+    def invalidate(self):
+        self._CACHE.invalidate()
+
+
+def invalidateSpecificationFacets(sender, **kwargs):
+    transaction.on_commit(SpecificationFacets.invalidate)
+
+
+def _updatePartNumbers(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or set(update_fields) & set(
+            ItemPartNumber.FIELDS):
+        ItemPartNumber.scheduleUpdate([instance.pk])
+
+
+def _scheduleSearchIndexUpdate(sender, instance, **kwargs):
+    itemId = instance.pk if sender is Item else instance.item_id
+    ItemSearchIndex.scheduleUpdate([itemId])
+
+
+def _scheduleSearchIndexUpdates(sender, instance, action, reverse, pk_set,
+                                **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        ItemSearchIndex.scheduleUpdate([instance.pk])
+    elif pk_set:
+        ItemSearchIndex.scheduleUpdate(pk_set)
+
+
+# The column of each related model that is copied into the item search
+# documents, the documents are only rebuilt when it changes.
+_RELATED_DOCUMENT_FIELDS = {
+    Category: 'path',
+    Distributor: 'name',
+    Manufacturer: 'name',
+    }
+
+
+def _saveRelatedDocumentField(sender, instance, update_fields=None,
+                              **kwargs):
+    name = _RELATED_DOCUMENT_FIELDS[sender]
+    value = getattr(instance, name)
+
+    if instance.pk is not None and (update_fields is None
+                                    or name in update_fields):
+        value = sender._base_manager.filter(pk=instance.pk).values_list(
+            name, flat=True).first()
+
+    instance._oldDocumentField = value
+
+
+def _scheduleRelatedSearchIndexUpdates(sender, instance, created=False,
+                                       **kwargs):
+    name = _RELATED_DOCUMENT_FIELDS[sender]
+    old = instance.__dict__.pop('_oldDocumentField', None)
+
+    # A new row has no items and only a rename changes the documents.
+    if created or old == getattr(instance, name):
+        return
+
+    if sender is Category:
+        descendants = CategoryClosure.objects.filter(
+            ancestor=instance).values('descendant_id')
+        items = Item.objects.filter(categories__in=descendants)
+    else:
+        items = Item.objects.filter(**{sender._meta.model_name: instance})
+
+    ItemSearchIndex.scheduleUpdate(
+        items.values_list('pk', flat=True).distinct())
+
+
+post_save.connect(_updatePartNumbers, sender=Item)
+post_save.connect(_scheduleSearchIndexUpdate, sender=Item)
+
+for model in (Cost, Specification):
+    post_save.connect(_scheduleSearchIndexUpdate, sender=model)
+    post_delete.connect(_scheduleSearchIndexUpdate, sender=model)
+
+for model in _RELATED_DOCUMENT_FIELDS:
+    pre_save.connect(_saveRelatedDocumentField, sender=model)
+    post_save.connect(_scheduleRelatedSearchIndexUpdates, sender=model)
+
+m2m_changed.connect(_scheduleSearchIndexUpdates,
+                    sender=Item.categories.through)
+
+for model in (Specification, Category):
+    post_save.connect(invalidateSpecificationFacets, sender=model)
+    post_delete.connect(invalidateSpecificationFacets, sender=model)
+
+m2m_changed.connect(invalidateSpecificationFacets,
+                    sender=Item.categories.through)
+
+# Rendered reports and searches built from these models, see
+# common.caching.TaggedCache.
+TaggedCache.watch(Item, Cost, Specification, Category, Currency, Distributor,
+                  Manufacturer)
+
+
+def invalidateItemCaches(sender, **kwargs):
+    """
+    Invalidate the cached pages built from the items, for changes made
+    without the model signals such as a purge.
+    """
+    TaggedCache.invalidateModels(Item, Cost, Specification, ItemSearchIndex)
+
+
+# The search form choices cached for each model (see
+# utils.searchforms.FindChoices) and the models that must clear them when
+# they change.
+SEARCH_CHOICE_DEPENDENCIES = {
+    Item: (Item,),
+    Category: (Category,),
+    LocationCodeCategory: (LocationCodeCategory,),
+    Distributor: (Distributor, Item),
+    Manufacturer: (Manufacturer, Item),
+    Country: (Distributor, Manufacturer),
+    }
+
+
+def invalidateSearchChoices(sender, **kwargs):
+    for model in SEARCH_CHOICE_DEPENDENCIES.get(sender, ()):
+        searchChoicesCache(model).invalidate()
+
+
+for model in SEARCH_CHOICE_DEPENDENCIES:
+    post_save.connect(invalidateSearchChoices, sender=model)
+    post_delete.connect(invalidateSearchChoices, sender=model)
@@ -0,0 +1,289 @@
+#
+# items/tests.py
+#
+
+import json
+from unittest import mock
+
+from django.test import TestCase
+from django.db import transaction
+from django.core.cache import cache
+from django.contrib.auth.models import User
+
+from inventory.apps.utils.models import PendingUpdates
+from inventory.apps.regions.models import Country, Region
+from inventory.apps.items.models import (
+    Item, Category, CategoryClosure, Distributor, Specification,
+    ItemSearchIndex, ItemPartNumber, SpecificationFacets)
+
+
+class ItemSearchIndexTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('tester', password='tester')
+
+        # Build the documents so nothing is left waiting for a commit.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.distributor = Distributor.objects.create(name="Acme",
+                                                          user=self.user)
+            self.items = [Item.objects.create(
+                title=f"Resistor {idx}", item_number=f"R-{idx}",
+                distributor=self.distributor, user=self.user)
+                          for idx in range(2)]
+
+    def _document(self, item):
+        return ItemSearchIndex.objects.get(item=item).document
+
+    def _scheduled(self, callbacks):
+        return [func for func in callbacks
+                if isinstance(func, PendingUpdates)
+                and func.update == ItemSearchIndex.update]
+
+    def test_update_scheduled_once(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            for item in self.items:
+                item.title = f"Capacitor {item.pk}"
+                item.save()
+
+        self.assertEqual(len(self._scheduled(callbacks)), 1)
+
+        for item in self.items:
+            self.assertIn("Capacitor", self._document(item))
+
+    def test_rolled_back_update(self):
+        first, second = self.items
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    first.save()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+
+            second.title = "Capacitor"
+            second.save()
+
+        self.assertEqual(len(self._scheduled(callbacks)), 1)
+        self.assertIn("Capacitor", self._document(second))
+
+    def test_related_rename(self):
+        self.distributor.name = "Widgets"
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.distributor.save()
+
+        for item in self.items:
+            self.assertIn("Widgets", self._document(item))
+
+    def test_related_save_without_rename(self):
+        category = Category.objects.create(name="Resistors", parent=None,
+                                           user=self.user)
+
+        with mock.patch.object(ItemSearchIndex, 'update') as update:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.distributor.url = "https://example.com/"
+                self.distributor.save()
+                category.save()
+
+        update.assert_not_called()
+
+
+class ItemPartNumberTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('tester', password='tester')
+
+    def _find(self, text):
+        items = Item.objects.filter(item_number__partnumber=text)
+        return list(items.values_list('item_number', flat=True))
+
+    def test_rebuilt_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            item = Item.objects.create(title="Regulator",
+                                       item_number="LM317T", user=self.user)
+            item.item_number = "LM7805"
+            item.save()
+            self.assertFalse(ItemPartNumber.objects.filter(item=item).exists())
+
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(self._find("7805"), ["LM7805"])
+        self.assertEqual(self._find("317"), [])
+
+    def test_other_fields_ignored(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            item = Item.objects.create(title="Regulator",
+                                       item_number="LM317T", user=self.user)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            item.save(update_fields=('title',))
+
+        self.assertFalse([func for func in callbacks
+                          if isinstance(func, PendingUpdates)
+                          and func.update == ItemPartNumber.update])
+
+
+class SpecificationFacetsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(self):
+        self.user = User.objects.create_user('tester', password='tester')
+        self.resistors = Category.objects.create(name="Resistors",
+                                                 parent=None, user=self.user)
+        self.capacitors = Category.objects.create(name="Capacitors",
+                                                  parent=None, user=self.user)
+        self.items = {}
+
+        for title, category, specs in (
+                ("R1", self.resistors, (("Resistance", "10k"),
+                                        ("Resistance", "10000"),
+                                        ("Package", "0805"))),
+                ("R2", self.resistors, (("Resistance", "10 kOhm"),
+                                        ("Package", "SMD"))),
+                ("R3", self.resistors, (("Resistance", "4k7"),
+                                        ("Package", "smd "))),
+                ("C1", self.capacitors, (("Capacitance", "100nF"),))):
+            item = Item.objects.create(title=title, item_number=title,
+                                       user=self.user)
+            item.categories.add(category)
+            self.items[title] = item
+
+            for name, value in specs:
+                Specification.objects.create(name=name, value=value,
+                                             item=item, user=self.user)
+
+    def _search(self, filters, category=None):
+        return sorted(SpecificationFacets.search(
+            filters, category).values_list('title', flat=True))
+
+    def test_search_by_number(self):
+        self.assertEqual(self._search({'Resistance': "10000"}), ["R1", "R2"])
+        self.assertEqual(self._search({'Resistance': "4.7k"}), ["R3"])
+
+    def test_search_by_text(self):
+        self.assertEqual(self._search({'Package': "SMD"}), ["R2", "R3"])
+
+    def test_search_range(self):
+        self.assertEqual(self._search({'Resistance': "1k..5k"}), ["R3"])
+        self.assertEqual(self._search({'Resistance': "5k.."}), ["R1", "R2"])
+        self.assertEqual(self._search({'Resistance': "..4700"}), ["R3"])
+        self.assertEqual(self._search({'Capacitance': "..1u"}), ["C1"])
+
+    def test_search_bad_range(self):
+        with self.assertRaises(ValueError):
+            self._search({'Resistance': "low..5k"})
+
+    def test_search_in_category(self):
+        self.assertEqual(self._search({}, self.capacitors.pk), ["C1"])
+
+    def test_count_facets(self):
+        facets = SpecificationFacets.countFacets(
+            SpecificationFacets.itemsInCategory(self.resistors.pk))
+        self.assertEqual(sorted(facets), ["Package", "Resistance"])
+        resistance = {facet['number']: facet['count']
+                      for facet in facets['Resistance']}
+        # R1 has both 10k and 10000, it is only counted once.
+        self.assertEqual(resistance, {'10000': 2, '4700': 1})
+        package = {facet['value'].casefold(): facet['count']
+                   for facet in facets['Package']}
+        self.assertEqual(package, {'smd': 2, '0805': 1})
+        self.assertEqual(facets['Resistance'][0]['count'], 2)
+
+
+class ProcessRegionTest(TestCase):
+
+    @classmethod
+    def setUpTestData(self):
+        self.user = User.objects.create_user('tester', password='tester')
+        country = Country.objects.create(
+            country="United States", country_code_2='US', user=self.user)
+        Region.objects.create(country=country, region_code='US-CA',
+                              region="California", user=self.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def _regions(self, country):
+        response = self.client.get('/lookup/regions/', {'country': country})
+        self.assertEqual(response.status_code, 200)
+        context = json.loads(response.content)
+        self.assertTrue(context['valid'])
+        return context['regions']
+
+    def test_regions(self):
+        regions = self._regions("United States (US)")
+        self.assertEqual(len(regions), 1)
+        self.assertIn("California", regions[0][0])
+
+    def test_no_code(self):
+        for country in ("", "United States", "United States ()"):
+            with self.subTest(country=country):
+                self.assertEqual(self._regions(country), [])
+
+
+class CategoryClosureTest(TestCase):
+    """
+    The CategoryClosure rows kept by Category.save(), see the
+    0004_categoryclosure migration.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user('tester', password='tester')
+        self.root = self._create("Root")
+        self.child = self._create("Child", self.root)
+        self.leaf = self._create("Leaf", self.child)
+        self.other = self._create("Other")
+
+    def _create(self, name, parent=None):
+        return Category.objects.create(name=name, parent=parent,
+                                       user=self.user)
+
+    def _closure(self):
+        names = {category.pk: category.name
+                 for category in Category.objects.all()}
+        return {(names[ancestor], names[descendant], depth)
+                for ancestor, descendant, depth in
+                CategoryClosure.objects.values_list(
+                    'ancestor_id', 'descendant_id', 'depth')}
+
+    def _rebuilt(self):
+        closure = self._closure()
+        Category.rebuildClosure()
+        self.assertEqual(self._closure(), closure)
+        return closure
+
+    def test_create(self):
+        self.assertEqual(self._rebuilt(), {
+            ("Root", "Root", 0), ("Child", "Child", 0), ("Leaf", "Leaf", 0),
+            ("Other", "Other", 0), ("Root", "Child", 1), ("Root", "Leaf", 2),
+            ("Child", "Leaf", 1)})
+
+    def test_reparent(self):
+        self.child.parent = self.other
+        self.child.save()
+        self.assertEqual(self._rebuilt(), {
+            ("Root", "Root", 0), ("Child", "Child", 0), ("Leaf", "Leaf", 0),
+            ("Other", "Other", 0), ("Other", "Child", 1),
+            ("Other", "Leaf", 2), ("Child", "Leaf", 1)})
+
+    def test_move_to_root(self):
+        self.child.parent = None
+        self.child.save()
+        self.assertEqual(self._rebuilt(), {
+            ("Root", "Root", 0), ("Child", "Child", 0), ("Leaf", "Leaf", 0),
+            ("Other", "Other", 0), ("Child", "Leaf", 1)})
+
+    def test_rename(self):
+        closure = {tuple("Renamed" if name == "Child" else name
+                         for name in row) for row in self._closure()}
+        self.child.name = "Renamed"
+        self.child.save()
+        self.assertEqual(self._rebuilt(), closure)
+
+    def test_delete(self):
+        self.child.delete()
+        self.assertEqual(self._rebuilt(), {
+            ("Root", "Root", 0), ("Other", "Other", 0)})
@@ -4,9 +4,11 @@
 
 from django.urls import re_path
 
-from inventory.apps.items.views import frontPage, processRegion
+from inventory.apps.items.views import (
+    frontPage, processRegion, specificationLookup)
 
 urlpatterns = [
     re_path(r'^$', frontPage),
     re_path(r'^lookup/regions/', processRegion),
+    re_path(r'^lookup/specifications/', specificationLookup),
     ]
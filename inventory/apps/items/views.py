@@ -8,11 +8,14 @@ from django.http import HttpResponse
 from django.template import loader
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 
 from inventory.apps.utils.views import ViewBase
-from inventory.apps.items.models import Distributor, Manufacturer
-from inventory.apps.regions.models import Country
-from inventory.settings import SITE_NAME, getLogger
+from inventory.apps.items.models import (
+    Distributor, Manufacturer, SpecificationFacets)
+from inventory.apps.regions.models import RegionLookup
+from inventory.settings import SITE_NAME, SEARCH_PAGE_SIZE, getLogger
 
 
 log = getLogger('inventory.views.items')
@@ -38,11 +41,16 @@ class FrontPage(ViewBase):
             tmpl = loader.get_template('frontPage_login.html')
 
         context['name'] = SITE_NAME
-        self._log.debug("Context dump for %s: %s", self.__module__, context)
+        self._dumpContext(context)
         return HttpResponse(tmpl.render(context))
 
 
 class ProcessRegion(ViewBase):
+    """
+    Returns the regions of a country as JSON. The lists come from the
+    RegionLookup cache and a GET is answered with a 304 if the client's
+    copy is still current.
+    """
     __MODELS_MAP = {'distributor': Distributor, 'manufacturer': Manufacturer}
 
     def __init__(self, log):
@@ -51,33 +59,22 @@ class ProcessRegion(ViewBase):
     @method_decorator(login_required(redirect_field_name='/login/'))
     def __call__(self, request, *args, **kwargs):
         context = {'valid': True}
+        safe = request.method in ('GET', 'HEAD')
+        params = request.GET if safe else request.POST
+        entry = None
 
         try:
-            country, delimiter, code = \
-                     request.POST.get('country').partition('(')
-            selected = None
-            pathname = request.POST.get('pathname', None)
-
-            if pathname:
-                self._log.debug("pathname: %s", pathname)
-                path = pathname.strip('/').split('/')
-                model = self.__MODELS_MAP.get(path[-2])
-                pk = path[-1]
-
-                if pk.isdigit():  # An update
-                    region = model.objects.get(pk=int(pk))
-                    selected = region.state_id
-                elif pk == "add":  # An add
-                    pass
-                else:
-                    # Error condition
-                    pass
-
-            code = code.strip(')')
-            record = Country.objects.get(country_code_2__iexact=code)
-            context['regions'] = [
-                (f"{m['region']} ({m['region_code']}: {m['primary_level']})",
-                 m['id']) for m in record.region_set.values()]
+            country, delimiter, code = params.get('country').partition('(')
+            code = code.strip(')').strip()
+            selected = self._getSelected(params.get('pathname', None))
+
+            if code:
+                entry = RegionLookup.getRegions(code)
+                context['regions'] = entry['regions']
+            else:
+                # Nothing to look up, e.g. no country was chosen.
+                context['regions'] = []
+
             context['selected'] = selected
         except Exception as e:
             msg = "Failed to find region records"
@@ -85,8 +82,107 @@ class ProcessRegion(ViewBase):
             context['valid'] = False
             context['message'] = msg + "."
 
-        self._log.debug("Context dump for %s: %s", self.__module__, context)
-        return HttpResponse(json.dumps(context))
+        self._dumpContext(context)
+
+        if entry is None:
+            return HttpResponse(json.dumps(context))
+
+        # The selected region is part of the response so it is part of the
+        # ETag.
+        etag = quote_etag(f"{entry['etag']}-{selected}")
+        lastModified = entry['last_modified']
+        response = None
+
+        if safe:
+            response = get_conditional_response(
+                request, etag=etag, last_modified=lastModified)
+
+        if response is None:
+            response = HttpResponse(json.dumps(context),
+                                    content_type='application/json')
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(lastModified)
+        patch_cache_control(response, private=True, max_age=0,
+                            must_revalidate=True)
+        return response
+
+    def _getSelected(self, pathname):
+        selected = None
+
+        if pathname:
+            self._log.debug("pathname: %s", pathname)
+            path = pathname.strip('/').split('/')
+            model = self.__MODELS_MAP.get(path[-2])
+            pk = path[-1]
+
+            if pk.isdigit():  # An update
+                selected = model.objects.filter(pk=int(pk)).values_list(
+                    'state_id', flat=True).first()
+            elif pk == "add":  # An add
+                pass
+            else:
+                # Error condition
+                pass
+
+        return selected
+
+
+class SpecificationLookup(ViewBase):
+    """
+    Searches items by their specifications and returns the matching items
+    and the facet counts of their specification values as JSON.
+
+    GET arguments:
+      category -- Optional primary key of the category to search within.
+      spec     -- Any number of 'Name:value' filters, see
+                  SpecificationFacets.specificationQuery().
+    """
+
+    def __init__(self, log):
+        super().__init__(log)
+
+    @method_decorator(login_required(redirect_field_name='/login/'))
+    def __call__(self, request, *args, **kwargs):
+        context = {'valid': True}
+
+        try:
+            category = request.GET.get('category') or None
+            category = category and int(category)
+            filters = self._getFilters(request.GET.getlist('spec'))
+            items = SpecificationFacets.search(filters, category)
+
+            if filters:
+                # Only the counts of a whole category are cached.
+                context['facets'] = SpecificationFacets.countFacets(items)
+            else:
+                context['facets'] = SpecificationFacets.getFacets(category)
+
+            records = list(items.order_by('pk').values(
+                'pk', 'title', 'item_number')[:SEARCH_PAGE_SIZE + 1])
+            context['more'] = len(records) > SEARCH_PAGE_SIZE
+            context['items'] = records[:SEARCH_PAGE_SIZE]
+        except Exception as e:
+            msg = "Failed to search specifications"
+            self._log.error(msg + ": %s", e)
+            context = {'valid': False, 'message': msg + "."}
+
+        self._dumpContext(context)
+        return HttpResponse(json.dumps(context),
+                            content_type='application/json')
+
+    def _getFilters(self, specs):
+        filters = {}
+
+        for spec in specs:
+            name, delimiter, value = spec.partition(':')
+
+            if not delimiter or not name.strip() or not value.strip():
+                raise ValueError(f"Invalid specification [{spec}].")
+
+            filters[name.strip()] = value
+
+        return filters
 
 
 ##############################
@@ -96,3 +192,6 @@ frontPage = FrontPage(log)
 
 # Find regions for either Distributor or Manufacturer.
 processRegion = ProcessRegion(log)
+
+# Search items by specification.
+specificationLookup = SpecificationLookup(log)
@@ -0,0 +1,23 @@
+#
+# jobs/admin.py
+#
+
+from django.contrib import admin
+
+from inventory.apps.jobs.models import Job
+from inventory.apps.utils.admin import BaseAdmin
+from inventory.settings import getLogger
+
+log = getLogger()
+
+
+class JobAdmin(BaseAdmin):
+    list_display = ('pk', 'name', 'status', 'progress', 'total', 'user',
+                    'started', 'finished',)
+    list_filter = ('status', 'name',)
+    readonly_fields = ('name', 'arguments', 'status', 'progress', 'total',
+                       'message', 'result', 'started', 'finished',
+                       'attempts',)
+    list_select_related = ('user',)
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,39 @@
+#
+# jobs/management/commands/runjobs.py
+#
+# Runs the queued jobs, start one or more of these next to the web server.
+#
+
+import signal
+
+from django.core.management.base import BaseCommand
+
+from inventory.apps.jobs.runner import JobRunner
+from inventory.settings import JOB_POLL_INTERVAL
+
+
+class Command(BaseCommand):
+    help = "Run the jobs in the queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Run the pending jobs then exit.")
+        parser.add_argument(
+            '--interval', type=float, default=JOB_POLL_INTERVAL,
+            help="Seconds to wait between polls of an empty queue.")
+
+    def handle(self, *args, **options):
+        runner = JobRunner(interval=options['interval'])
+
+        if options['once']:
+            while runner.runNext():
+                pass
+        else:
+            # Finish the current job before exiting.
+            signal.signal(signal.SIGTERM, lambda *args: runner.stop())
+
+            try:
+                runner.runForever()
+            except KeyboardInterrupt:
+                pass
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.4 on 2026-10-18 17:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ctime', models.DateTimeField(auto_now_add=True)),
+                ('mtime', models.DateTimeField(auto_now=True)),
+                ('name', models.CharField(db_index=True, help_text="The name the job's handler is registered under.", max_length=50, verbose_name='Name')),
+                ('arguments', models.JSONField(blank=True, default=dict, verbose_name='Arguments')),
+                ('status', models.SmallIntegerField(choices=[(0, 'Pending'), (1, 'Running'), (2, 'Done'), (3, 'Failed'), (4, 'Cancelled')], db_index=True, default=0, verbose_name='Status')),
+                ('progress', models.PositiveIntegerField(default=0, verbose_name='Progress')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Total')),
+                ('message', models.CharField(blank=True, default='', max_length=248, verbose_name='Message')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='Result')),
+                ('cancel', models.BooleanField(default=False, verbose_name='Cancel Requested')),
+                ('started', models.DateTimeField(blank=True, null=True, verbose_name='Started')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='Finished')),
+                ('user', models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('-pk',),
+            },
+        ),
+    ]
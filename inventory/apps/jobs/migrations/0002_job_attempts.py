@@ -0,0 +1,18 @@
+# Generated by Django 6.0.4 on 2026-10-18 17:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, help_text='The number of times a worker has started the job.', verbose_name='Attempts'),
+        ),
+    ]
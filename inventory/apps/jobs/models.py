@@ -0,0 +1,191 @@
+#
+# jobs/models.py
+#
+# A database backed queue of jobs run by the runjobs management command.
+#
+
+import datetime
+
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from inventory.apps.utils.models import Base
+from inventory.apps.utils.exceptions import JobCancelled
+from inventory.settings import JOB_STALE_TIMEOUT, JOB_MAX_ATTEMPTS
+
+
+class Job(Base):
+    PENDING = 0
+    RUNNING = 1
+    DONE = 2
+    FAILED = 3
+    CANCELLED = 4
+    STATUS_TYPES = (
+        (PENDING, _("Pending")),
+        (RUNNING, _("Running")),
+        (DONE, _("Done")),
+        (FAILED, _("Failed")),
+        (CANCELLED, _("Cancelled")),
+        )
+    FINISHED = (DONE, FAILED, CANCELLED)
+
+    name = models.CharField(
+        max_length=50, verbose_name=_("Name"), db_index=True,
+        help_text=_("The name the job's handler is registered under."))
+    arguments = models.JSONField(
+        default=dict, blank=True, verbose_name=_("Arguments"))
+    status = models.SmallIntegerField(
+        choices=STATUS_TYPES, default=PENDING, verbose_name=_("Status"),
+        db_index=True)
+    progress = models.PositiveIntegerField(
+        default=0, verbose_name=_("Progress"))
+    total = models.PositiveIntegerField(default=0, verbose_name=_("Total"))
+    message = models.CharField(
+        max_length=248, blank=True, default='', verbose_name=_("Message"))
+    result = models.JSONField(blank=True, null=True, verbose_name=_("Result"))
+    cancel = models.BooleanField(
+        default=False, verbose_name=_("Cancel Requested"))
+    started = models.DateTimeField(
+        blank=True, null=True, verbose_name=_("Started"))
+    finished = models.DateTimeField(
+        blank=True, null=True, verbose_name=_("Finished"))
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name=_("Attempts"),
+        help_text=_("The number of times a worker has started the job."))
+
+    @classmethod
+    def enqueue(self, name, user, **arguments):
+        """
+        Add a job to the queue.
+
+        :param str name: The name of a registered handler.
+        :param user: The user the job is run for.
+        :param arguments: The keyword arguments passed to the handler, they
+                          must be serializable as JSON.
+        :returns: The new job.
+        """
+        return self.objects.create(name=name, user=user, arguments=arguments)
+
+    @classmethod
+    def claimNext(self):
+        """
+        Mark the oldest pending job as running and return it. The status is
+        changed with a conditional update so that only one worker process
+        can claim a job.
+
+        :returns: The claimed job or None if the queue is empty.
+        """
+        pks = self.objects.filter(status=self.PENDING).order_by(
+            'pk').values_list('pk', flat=True)
+
+        for pk in pks[:10]:
+            now = timezone.now()
+            claimed = self.objects.filter(pk=pk, status=self.PENDING).update(
+                status=self.RUNNING, started=now, mtime=now,
+                attempts=models.F('attempts') + 1)
+
+            if claimed:
+                return self.objects.get(pk=pk)
+
+        return None
+
+    @classmethod
+    def requeueStale(self, timeout=JOB_STALE_TIMEOUT,
+                     maxAttempts=JOB_MAX_ATTEMPTS):
+        """
+        Put the running jobs that have not reported their progress for
+        'timeout' seconds back in the queue, their worker is taken to have
+        died. A job that has already been started 'maxAttempts' times is
+        failed instead and a job waiting to be cancelled is cancelled.
+
+        :returns: The number of stale jobs found.
+        """
+        now = timezone.now()
+        stale = self.objects.filter(
+            status=self.RUNNING,
+            mtime__lt=now - datetime.timedelta(seconds=timeout))
+        count = stale.filter(cancel=True).update(
+            status=self.CANCELLED, finished=now, mtime=now)
+        count += stale.filter(attempts__gte=maxAttempts).update(
+            status=self.FAILED, finished=now, mtime=now,
+            message="The worker running the job stopped.")
+        count += stale.update(status=self.PENDING, started=None, progress=0,
+                              mtime=now)
+        return count
+
+    def _thisAttempt(self):
+        """
+        Return a queryset of the job while it is still running the attempt
+        this instance was claimed for, it is empty once requeueStale() has
+        given the job to another worker.
+        """
+        return type(self).objects.filter(pk=self.pk, status=self.RUNNING,
+                                         attempts=self.attempts)
+
+    def setProgress(self, progress, total=None):
+        """
+        Save the progress of a running job and stop it if it has been
+        cancelled.
+
+        :raises JobCancelled: If a cancel was requested or the job was
+                              requeued while this worker was still running
+                              it.
+        """
+        self.progress = progress
+        # The mtime shows the job's worker is still alive, see
+        # requeueStale().
+        fields = {'progress': progress, 'mtime': timezone.now()}
+
+        if total is not None:
+            self.total = fields['total'] = total
+
+        queryset = self._thisAttempt()
+
+        if not queryset.update(**fields):
+            raise JobCancelled(f"Job {self.pk} was requeued, attempt "
+                               f"{self.attempts} stopped.")
+
+        if queryset.filter(cancel=True).exists():
+            self.cancel = True
+            raise JobCancelled(f"Job {self.pk} was cancelled.")
+
+    def requestCancel(self):
+        """
+        Cancel a pending job now, a running job stops the next time it
+        reports its progress.
+        """
+        queryset = type(self).objects.filter(pk=self.pk)
+        queryset.filter(status=self.PENDING).update(
+            status=self.CANCELLED, cancel=True, finished=timezone.now())
+        queryset.exclude(status__in=self.FINISHED).update(cancel=True)
+        self.refresh_from_db()
+
+    def finish(self, status, message='', result=None):
+        """
+        Save the outcome of the attempt this instance was claimed for. A
+        job requeued by requeueStale() is left to the worker that now has
+        it.
+
+        :returns: True if the job was updated.
+        """
+        self.status = status
+        self.message = message[:248]
+        self.result = result
+        self.finished = self.mtime = timezone.now()
+        return bool(self._thisAttempt().update(
+            status=status, message=self.message, result=result,
+            finished=self.finished, mtime=self.mtime))
+
+    def toDict(self):
+        return {'id': self.pk, 'name': self.name, 'status': self.status,
+                'status_name': str(self.get_status_display()),
+                'finished': self.status in self.FINISHED,
+                'progress': self.progress, 'total': self.total,
+                'message': self.message, 'result': self.result}
+
+    def __str__(self):
+        return f"{self.name} ({self.get_status_display()})"
+
+    class Meta:
+        ordering = ('-pk',)
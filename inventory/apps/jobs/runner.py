@@ -0,0 +1,124 @@
+#
+# jobs/runner.py
+#
+# The registry of job handlers and the worker loop that runs them.
+#
+
+import time
+
+from django.db import close_old_connections
+from django.utils.module_loading import autodiscover_modules
+
+from inventory.apps.jobs.models import Job
+from inventory.apps.utils.exceptions import JobCancelled
+from inventory.settings import (
+    getLogger, JOB_POLL_INTERVAL, JOB_STALE_TIMEOUT)
+
+log = getLogger()
+
+
+class JobRunner:
+    """
+    Runs the jobs in the queue. Handlers are registered by name in a 'jobs'
+    module of any installed app:
+
+    @JobRunner.register('purge')
+    def purge(job, pks=()):
+        ...
+        job.setProgress(done, total)
+        return result
+
+    A handler is called with the job and the job's arguments, it should
+    call job.setProgress() as it works which also stops the job if it was
+    cancelled. Whatever it returns must be serializable as JSON and is
+    saved as the job's result.
+    """
+    __HANDLERS = {}
+
+    def __init__(self, interval=JOB_POLL_INTERVAL):
+        """
+        JobRunner constructor.
+
+        :param float interval: Seconds to wait when the queue is empty.
+        """
+        self._interval = interval
+        self._running = False
+        # Look for the jobs of dead workers as soon as the runner starts.
+        self._staleCheckAt = 0
+        autodiscover_modules('jobs')
+
+    @classmethod
+    def register(self, name):
+        def decorator(handler):
+            self.__HANDLERS[name] = handler
+            return handler
+
+        return decorator
+
+    @classmethod
+    def getHandler(self, name):
+        return self.__HANDLERS.get(name)
+
+    def runForever(self):
+        self._running = True
+
+        while self._running:
+            if not self.runNext():
+                time.sleep(self._interval)
+
+    def stop(self):
+        self._running = False
+
+    def runNext(self):
+        """
+        Run the next pending job.
+
+        :returns: True if a job was run, False if the queue was empty.
+        """
+        close_old_connections()
+        self._requeueStale()
+        job = Job.claimNext()
+
+        if job is None:
+            return False
+
+        self.run(job)
+        return True
+
+    def _requeueStale(self):
+        now = time.monotonic()
+
+        if now < self._staleCheckAt:
+            return
+
+        self._staleCheckAt = now + JOB_STALE_TIMEOUT
+        count = Job.requeueStale()
+
+        if count:
+            log.warning("Recovered %s jobs left running by a stopped worker.",
+                        count)
+
+    def run(self, job):
+        handler = self.getHandler(job.name)
+        log.info("Starting job %s: %s", job.pk, job.name)
+
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for {job.name}.")
+
+            result = handler(job, **job.arguments)
+        except JobCancelled as e:
+            log.info(str(e))
+            finished = job.finish(Job.CANCELLED, "Cancelled by user.")
+        except Exception as e:
+            log.error("Job %s: %s failed, %s", job.pk, job.name, e,
+                      exc_info=True)
+            finished = job.finish(Job.FAILED, str(e))
+        else:
+            log.info("Finished job %s: %s", job.pk, job.name)
+            finished = job.finish(Job.DONE, result=result)
+
+        if not finished:
+            log.warning("Job %s: %s was requeued while attempt %s ran, its "
+                        "outcome was not saved.", job.pk, job.name,
+                        job.attempts)
@@ -0,0 +1,15 @@
+#
+# jobs/settings.py
+#
+# Django settings for the jobs app.
+#
+
+# Seconds a worker waits before looking at an empty queue again.
+JOB_POLL_INTERVAL = 2
+# Seconds a running job may go without reporting its progress before its
+# worker is taken to have died and the job is run again. A handler must
+# call job.setProgress() more often than this.
+JOB_STALE_TIMEOUT = 600
+# The most times a job is started, a job that keeps killing its worker is
+# failed after this.
+JOB_MAX_ATTEMPTS = 3
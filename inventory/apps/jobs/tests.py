@@ -0,0 +1,143 @@
+#
+# jobs/tests.py
+#
+
+import datetime
+
+from django.test import TestCase
+from django.utils import timezone
+from django.contrib.auth.models import User
+
+from inventory.apps.items.models import Item
+from inventory.apps.jobs.models import Job
+from inventory.apps.jobs.runner import JobRunner
+from inventory.apps.maintenance.purge import ItemPurge
+from inventory.apps.utils.exceptions import JobCancelled
+from inventory.settings import (
+    JOB_STALE_TIMEOUT, JOB_MAX_ATTEMPTS, getLogger)
+
+
+@JobRunner.register('test-echo')
+def echo(job, value=None):
+    job.setProgress(1, 1)
+    return value
+
+
+class StaleJobTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('tester', password='tester')
+
+    def _claim(self, name='test-echo', age=JOB_STALE_TIMEOUT + 1, **kwargs):
+        """
+        Return a job claimed by a worker that stopped 'age' seconds ago.
+        """
+        job = Job.enqueue(name, self.user, **kwargs)
+        # The claimed instance has the attempt number the worker has.
+        claimed = Job.claimNext()
+        self.assertEqual(claimed.pk, job.pk)
+        Job.objects.filter(pk=job.pk).update(
+            mtime=timezone.now() - datetime.timedelta(seconds=age))
+        return claimed
+
+    def test_claim_counts_attempts(self):
+        job = self._claim()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.RUNNING)
+        self.assertEqual(job.attempts, 1)
+
+    def test_stale_job_requeued(self):
+        job = self._claim()
+        self.assertEqual(Job.requeueStale(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertIsNone(job.started)
+
+    def test_running_job_left_alone(self):
+        job = self._claim(age=0)
+        self.assertEqual(Job.requeueStale(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.RUNNING)
+
+    def test_progress_keeps_job_alive(self):
+        job = self._claim()
+        job.setProgress(1, 2)
+        self.assertEqual(Job.requeueStale(), 0)
+
+    def test_stale_cancelled_job(self):
+        job = self._claim()
+        job.requestCancel()
+        Job.requeueStale()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.CANCELLED)
+
+    def test_stale_job_failed_after_max_attempts(self):
+        job = self._claim()
+        Job.objects.filter(pk=job.pk).update(attempts=JOB_MAX_ATTEMPTS)
+        Job.requeueStale()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+
+    def test_runner_recovers_stale_job(self):
+        job = self._claim(value=42)
+        runner = JobRunner()
+        self.assertTrue(runner.runNext())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.result, 42)
+        self.assertEqual(job.attempts, 2)
+
+    def test_requeued_job_taken_over(self):
+        # The first worker was slow, not dead.
+        slow = self._claim()
+        Job.requeueStale()
+        job = Job.claimNext()
+        self.assertEqual(job.attempts, 2)
+
+        with self.assertRaises(JobCancelled):
+            slow.setProgress(1, 2)
+
+        self.assertFalse(slow.finish(Job.FAILED, "Too slow"))
+        self.assertTrue(job.finish(Job.DONE, result=1))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.message, '')
+
+
+class PurgeJobTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('tester', password='tester')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pks = [Item.objects.create(
+                title=f"Resistor {idx}", item_number=f"R-{idx}",
+                user=self.user).pk for idx in range(4)]
+
+    def _age(self, job):
+        Job.objects.filter(pk=job.pk).update(mtime=timezone.now(
+            ) - datetime.timedelta(seconds=JOB_STALE_TIMEOUT + 1))
+
+    def test_requeued_purge_resumes(self):
+        job = Job.enqueue('purge', self.user, pks=self.pks)
+        runner = JobRunner()
+        self.assertEqual(Job.claimNext().pk, job.pk)
+        # The worker committed the first batch and then stopped.
+        ItemPurge(getLogger()).purge(self.pks[:2], atomic=False)
+        self._age(job)
+        self.assertEqual(Job.requeueStale(), 1)
+
+        self.assertTrue(runner.runNext())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE, job.message)
+        self.assertEqual((job.progress, job.total), (4, 4))
+        self.assertEqual(job.result['items.Item'], 2)
+        self.assertFalse(Item.objects.filter(pk__in=self.pks).exists())
+
+    def test_missing_item_fails(self):
+        job = Job.enqueue('purge', self.user, pks=self.pks + [0])
+        self.assertTrue(JobRunner().runNext())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn("does not exist", job.message)
+        self.assertEqual(Item.objects.filter(pk__in=self.pks).count(), 4)
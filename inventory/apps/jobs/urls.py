@@ -0,0 +1,13 @@
+#
+# jobs/urls.py
+#
+
+from django.urls import re_path
+
+from inventory.apps.jobs.views import status, cancel
+
+
+urlpatterns = [
+    re_path(r'^(?P<pk>\d+)/$', status),
+    re_path(r'^(?P<pk>\d+)/cancel/$', cancel),
+    ]
@@ -0,0 +1,80 @@
+#
+# jobs/views.py
+#
+
+import json
+from django.http import HttpResponse
+from django.contrib.auth.decorators import login_required
+from django.utils.decorators import method_decorator
+
+from inventory.settings import getLogger
+from inventory.apps.utils.views import ViewBase
+from inventory.apps.jobs.models import Job
+
+
+log = getLogger()
+
+
+class JobBase(ViewBase):
+
+    def __init__(self, log):
+        super().__init__(log)
+
+    @method_decorator(login_required(redirect_field_name='/login/'))
+    def __call__(self, request, *args, **kwargs):
+        context = {}
+        context['valid'] = False
+        pk = kwargs.get('pk')
+        jobs = Job.objects.all()
+
+        if not request.user.is_superuser:
+            jobs = jobs.filter(user=request.user)
+
+        try:
+            job = jobs.get(pk=int(pk))
+        except (Job.DoesNotExist, TypeError, ValueError):
+            context['message'] = "Job [%s] does not exist." % pk
+        else:
+            context['valid'] = True
+            self._processJob(request, job, context)
+            context['job'] = job.toDict()
+
+        self._dumpContext(context)
+        return HttpResponse(json.dumps(context),
+                            content_type='application/json')
+
+    def _processJob(self, request, job, context):
+        msg = "_processJob() must be defined in the subclass."
+        raise NotImplementedError(msg)
+
+
+class Status(JobBase):
+
+    def __init__(self, log):
+        super().__init__(log)
+
+    def _processJob(self, request, job, context):
+        context['message'] = job.message
+
+
+class Cancel(JobBase):
+
+    def __init__(self, log):
+        super().__init__(log)
+
+    def _processJob(self, request, job, context):
+        if request.method != 'POST':
+            context['valid'] = False
+            context['message'] = "A job can only be cancelled with a POST."
+        elif job.status in Job.FINISHED:
+            context['message'] = "The job has already finished."
+        else:
+            job.requestCancel()
+            context['message'] = "The job is being cancelled."
+
+
+##############################
+# Instantiate view callables #
+##############################
+status = Status(log)
+cancel = Cancel(log)
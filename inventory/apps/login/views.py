@@ -47,7 +47,7 @@ class Login(ViewBase):
         context['name'] = SITE_NAME
         context['form'] = form
         context['redirect'] = redirect
-        self._log.debug("Context dump for %s: %s", self.__module__, context)
+        self._dumpContext(context)
         response = HttpResponse(tmpl.render(context))
         response.set_cookie("csrftoken", request.META.get("CSRF_COOKIE", ""),
                             secure=True)
@@ -105,7 +105,7 @@ class ProcessLogin(ViewBase):
                                   "user, check username and password.")
             username = username and username or None
 
-        self._log.debug("Context dump for %s: %s", self.__module__, context)
+        self._dumpContext(context)
         return HttpResponse(json.dumps(context))
 
 
@@ -138,7 +138,7 @@ class CreateUser(ViewBase):
         context['name'] = SITE_NAME
         context['form'] = form
         context.update(csrf(request))
-        self._log.debug("Context dump for %s: %s", self.__module__, context)
+        self._dumpContext(context)
         return HttpResponse(tmpl.render(context))
 
 
@@ -160,7 +160,7 @@ class ProcessCreateUser(ViewBase):
             context['valid'] = False
             context['content'] = self._formHTML(form, "create")
 
-        self._log.debug("Context dump for %s: %s", self.__module__, context)
+        self._dumpContext(context)
         return HttpResponse(json.dumps(context))
 
 
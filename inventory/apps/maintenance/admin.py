@@ -8,7 +8,7 @@ from django.utils.translation import gettext_lazy as _
 
 from inventory.apps.maintenance.models import (
     LocationCodeDefault, LocationCodeCategory)
-from inventory.apps.utils.admin import BaseAdmin
+from inventory.apps.utils.admin import BaseAdmin, TreeAdmin
 from inventory.settings import getLogger
 
 log = getLogger()
@@ -110,9 +110,10 @@ class LocationCodeDefaultAdmin(BaseAdmin):
 admin.site.register(LocationCodeDefault, LocationCodeDefaultAdmin)
 
 
-class LocationCodeCategoryAdmin(BaseAdmin):
+class LocationCodeCategoryAdmin(TreeAdmin):
     list_display = ('segment', '_parentsProducer', '_levelProducer',
                     '_charDefProducer')
+    list_select_related = ('char_definition',)
     search_fields = ('segment',)
     ordering = ('segment',)
     form = LocationCodeCategoryForm
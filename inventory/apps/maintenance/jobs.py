@@ -0,0 +1,37 @@
+#
+# maintenance/jobs.py
+#
+# Jobs run by the runjobs management command.
+#
+
+from inventory.apps.items.models import Item
+from inventory.apps.jobs.runner import JobRunner
+from inventory.apps.maintenance.purge import ItemPurge
+from inventory.settings import getLogger
+
+log = getLogger()
+
+
+@JobRunner.register('purge')
+def purge(job, pks=()):
+    """
+    Purge the items in 'pks', each batch is committed as it is done so the
+    progress can be seen and the purge can be cancelled part way.
+
+    A job requeued after its worker stopped resumes with the items that
+    are left, the batches already committed are counted as done but not in
+    the result.
+    """
+    total = len(set(pks))
+
+    if job.attempts > 1:
+        pks = list(Item.objects.filter(pk__in=pks).values_list(
+            'pk', flat=True))
+
+    done = total - len(pks)
+
+    def progress(count, batchTotal):
+        job.setProgress(done + count, total)
+
+    progress(0, len(pks))
+    return ItemPurge(log).purge(pks, progress=progress, atomic=False)
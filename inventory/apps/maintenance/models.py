@@ -2,11 +2,14 @@
 # maintenance/models.py
 #
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 
-from inventory.apps.utils.models import Base
+from inventory.common.caching import ProcessCache, TaggedCache
+from inventory.apps.utils.models import Base, TreeMixin
 from inventory.apps.utils import modelfields
 from inventory.apps.utils.utilities import FormatParser
 
@@ -94,7 +97,55 @@ class LocationCodeDefault(Base):
         verbose_name_plural = _("Location Code Defaults")
 
 
-class LocationCodeCategory(Base):
+class LocationCodeFormats:
+    """
+    A process wide registry of the character definitions and segment
+    separator found in the LocationCodeDefault table along with the parser
+    built from them. It is loaded once and reloaded only after a
+    LocationCodeDefault is saved or deleted.
+    """
+    __cache = ProcessCache('location-code-formats')
+    __KEY = 'formats'
+
+    @classmethod
+    def _load(self):
+        records = list(LocationCodeDefault.objects.values_list(
+            'char_definition', 'segment_separator'))
+        formats = tuple(fmt for fmt, sep in records)
+        separator = records[0][1] if records else ''
+        return {'formats': formats, 'separator': separator,
+                'parser': FormatParser.getParser(formats, separator)}
+
+    @classmethod
+    def _get(self, key):
+        return self.__cache.getOrSet(self.__KEY, self._load)[key]
+
+    @classmethod
+    def getFormats(self):
+        return self._get('formats')
+
+    @classmethod
+    def getSeparator(self):
+        return self._get('separator')
+
+    @classmethod
+    def getParser(self):
+        return self._get('parser')
+
+    @classmethod
+    def invalidate(self):
+        self.__cache.invalidate()
+
+
+@receiver((post_save, post_delete), sender=LocationCodeDefault)
+def _invalidateLocationCodeFormats(sender, **kwargs):
+    LocationCodeFormats.invalidate()
+    # Other processes could reload the old rows before the commit.
+    transaction.on_commit(LocationCodeFormats.invalidate)
+
+
+class LocationCodeCategory(TreeMixin, Base):
+    _PATH_FIELD = 'segment'
     parent = models.ForeignKey("self", blank=True, null=True,
                                default=0, related_name='children',
                                on_delete=models.CASCADE)
@@ -106,12 +157,17 @@ class LocationCodeCategory(Base):
     char_definition = models.ForeignKey(LocationCodeDefault, editable=False,
                                         on_delete=models.CASCADE)
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._formats = [fmt.char_definition
-                         for fmt in LocationCodeDefault.objects.all()]
-        self._separator = LocationCodeDefault.getSegmentSeparator()
-        self._parser = FormatParser(self._formats, self._separator)
+    @property
+    def _formats(self):
+        return LocationCodeFormats.getFormats()
+
+    @property
+    def _separator(self):
+        return LocationCodeFormats.getSeparator()
+
+    @property
+    def _parser(self):
+        return LocationCodeFormats.getParser()
 
     def _getCategoryPath(self, current=True):
         parents = LocationCodeCategory.getParents(self)
@@ -121,23 +177,6 @@ class LocationCodeCategory(Base):
 
         return self._separator.join([parent.segment for parent in parents])
 
-    @classmethod
-    def getParents(self, category):
-        parents = LocationCodeCategory._recurseParents(category)
-        parents.reverse()
-        return parents
-
-    @classmethod
-    def _recurseParents(self, category):
-        parents = []
-
-        if category.parent_id:
-            parents.append(category.parent)
-            more = LocationCodeCategory._recurseParents(category.parent)
-            parents.extend(more)
-
-        return parents
-
     def _levelProducer(self):
         path = self._getCategoryPath()
         return path.count(self._separator)
@@ -191,24 +230,35 @@ class LocationCodeCategory(Base):
             old_parent_id = type(self).objects.filter(pk=self.pk).values_list(
                 "parent_id", flat=True).first()
 
-        # Fix our self.
-        self.path = self._getCategoryPath()
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            # Fix our self.
+            self.path = self._getCategoryPath()
+            super().save(*args, **kwargs)
+
+            # Only cascade if parent changed
+            if old_parent_id != self.parent_id:
+                self._update_descendants()
 
-        # Only cascade if parent changed
-        if old_parent_id != self.parent_id:
-            self._update_descendants()
+    def _getPathSeparator(self):
+        return self._separator
 
-    def _update_descendants(self):
-        for child in self.children.all():
-            child.path = child._getCategoryPath()
-            child.save(update_fields=["path"])  # avoids full save side-effects
-            child._update_descendants()
+    def _cleanDescendants(self, descendants):
+        if descendants:
+            maxNumSegments = LocationCodeDefault.getMaxNumSegments()
+            length = (len(LocationCodeCategory.getParents(self)) + 1
+                      + max(node.tree_depth for node in descendants))
+
+            if length > maxNumSegments:
+                msg = ("There are too many segments in the location codes "
+                       f"below this one, found: {length}, allowed: "
+                       f"{maxNumSegments}")
+                raise ValidationError(_(msg))
 
     @classmethod
     def getAllRootTrees(self, segment):
         result = []
-        records = LocationCodeCategory.objects.filter(segment=segment)
+        records = LocationCodeCategory.prefetchParents(
+            LocationCodeCategory.objects.filter(segment=segment))
 
         if len(records) > 0:
             result[:] = [LocationCodeCategory.getParents(record)
@@ -232,3 +282,6 @@ class LocationCodeCategory(Base):
         verbose_name = _("Location Code")
         verbose_name_plural = _("Location Codes")
         ordering = ('path',)
+
+
+TaggedCache.watch(LocationCodeCategory)
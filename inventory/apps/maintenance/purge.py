@@ -0,0 +1,130 @@
+#
+# maintenance/purge.py
+#
+# Set based deletion of items and the rows that depend on them.
+#
+
+from django.db import transaction
+
+from inventory.apps.items.models import (
+    Item, Cost, Specification, ItemSearchIndex, ItemPartNumber,
+    invalidateSearchChoices, invalidateSpecificationFacets,
+    invalidateItemCaches)
+from inventory.apps.utils.exceptions import DoesNotExist
+
+
+class ItemPurge:
+    """
+    Deletes items in batches of primary keys. The rows that reference the
+    items are removed first with one DELETE per table per batch, the
+    models' delete() methods and signals are bypassed so anything that
+    depends on them must be listed here.
+    """
+    BATCH_SIZE = 500
+    # Models with a foreign key to Item as (model, field name) tuples, they
+    # are deleted in this order before the items.
+    RELATED = [
+        (Cost, 'item'),
+        (Specification, 'item'),
+        (Item.location_code.through, 'item'),
+        (Item.categories.through, 'item'),
+        (ItemSearchIndex, 'item'),
+        (ItemPartNumber, 'item'),
+        ]
+    # Called with the Item model after the purge is committed.
+    INVALIDATORS = [invalidateSearchChoices, invalidateSpecificationFacets,
+                    invalidateItemCaches]
+
+    def __init__(self, log, batchSize=BATCH_SIZE):
+        """
+        ItemPurge constructor.
+
+        :param log: The logger to report on.
+        :param int batchSize: The number of items deleted per batch.
+        """
+        self._log = log
+        self._batchSize = batchSize
+
+    def purge(self, pks, progress=None, atomic=True):
+        """
+        Delete the items with the primary keys in 'pks' and their costs,
+        specifications, location codes and categories. Nothing is deleted
+        if any of the items do not exist.
+
+        :param list pks: The primary keys of the items.
+        :param progress: Optional callable called after each batch with the
+                         number of items done and the total, it may raise
+                         an exception to stop the purge.
+        :param bool atomic: If True all the batches are deleted in one
+                            transaction, if False each batch is committed
+                            on its own so that the progress is visible to
+                            other connections and a stopped purge keeps the
+                            batches already done.
+        :returns: A dict of the number of rows deleted keyed by model label.
+        :raises DoesNotExist: If an item is not found.
+        """
+        pks = sorted({int(pk) for pk in pks})
+        self._log.debug("Deleting PKs: %s", pks)
+
+        if atomic:
+            with transaction.atomic():
+                totals = self._purgeBatches(pks, progress)
+                transaction.on_commit(self._invalidate)
+        else:
+            for idx in range(0, len(pks), self._batchSize):
+                self._checkExists(pks[idx:idx + self._batchSize])
+
+            try:
+                totals = self._purgeBatches(pks, progress)
+            finally:
+                self._invalidate()
+
+        return totals
+
+    def _purgeBatches(self, pks, progress):
+        totals = {}
+
+        for idx in range(0, len(pks), self._batchSize):
+            batch = pks[idx:idx + self._batchSize]
+
+            with transaction.atomic():
+                counts = self._deleteBatch(batch)
+
+            self._log.info("Deleted batch %s of %s: %s",
+                           idx // self._batchSize + 1,
+                           -(-len(pks) // self._batchSize), counts)
+
+            for label, count in counts.items():
+                totals[label] = totals.get(label, 0) + count
+
+            if progress:
+                progress(idx + len(batch), len(pks))
+
+        return totals
+
+    def _checkExists(self, batch):
+        found = set(Item.objects.filter(pk__in=batch).values_list(
+            'pk', flat=True))
+        missing = [pk for pk in batch if pk not in found]
+
+        if missing:
+            msg = "Record [%s] does not exist" % missing[0]
+            self._log.warning(msg + ", missing PKs: %s", missing)
+            raise DoesNotExist(msg + ".")
+
+    def _deleteBatch(self, batch):
+        self._checkExists(batch)
+        counts = {}
+
+        for model, field in self.RELATED:
+            queryset = model._base_manager.filter(**{
+                f"{field}__in": batch})
+            counts[model._meta.label] = queryset._raw_delete(queryset.db)
+
+        queryset = Item._base_manager.filter(pk__in=batch)
+        counts[Item._meta.label] = queryset._raw_delete(queryset.db)
+        return counts
+
+    def _invalidate(self):
+        for invalidator in self.INVALIDATORS:
+            invalidator(Item)
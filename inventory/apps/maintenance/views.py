@@ -10,8 +10,7 @@ from django.utils.decorators import method_decorator
 from inventory.settings import getLogger
 from inventory.apps.utils.views import ViewBase
 from inventory.apps.utils.search import ItemSearch
-from inventory.apps.utils.exceptions import DoesNotExist
-from inventory.apps.items.models import Item
+from inventory.apps.jobs.models import Job
 
 
 log = getLogger()
@@ -36,7 +35,7 @@ class Confirm(ViewBase):
                 context['message'] = ("Confirm your choices then click submit "
                                       "again.")
 
-        self._log.debug("Context dump for %s: %s", self.__module__, context)
+        self._dumpContext(context)
         return HttpResponse(json.dumps(context))
 
 
@@ -57,79 +56,26 @@ class Delete(ViewBase):
 
             if context['valid']:
                 try:
-                    self._deleteRecords(pks)
-                    context['message'] = ("The selected records have been "
+                    job = self._deleteRecords(request, pks)
+                except ValueError:
+                    context['valid'] = False
+                    context['message'] = "Invalid IDs sent from client."
+                else:
+                    context['job'] = job.pk
+                    context['message'] = ("The selected records are being "
                                           "deleted.")
-                except DoesNotExist as e:
-                    context['message'] = str(e)
-                except Exception:
-                    # Send error message
-                    pass
 
-        self._log.debug("Context dump for %s: %s", self.__module__, context)
+        self._dumpContext(context)
         return HttpResponse(json.dumps(context))
 
-    def _deleteRecords(self, pks):
-        # Make the PKs integers.
-        pks = [int(pk) for pk in pks]
-        self._log.debug("Deleting PKs: %s", pks)
-
-        for pk in pks:
-            try:
-                record = Item.objects.get(pk=pk)
-            except Item.DoesNotExist as e:
-                msg = "Record [%s] does not exist" % pk
-                self._log.warning(msg + ", %s", e)
-                raise DoesNotExist(msg + ".")
-            except Exception as e:
-                self._log.warning(str(e))
-                raise e
-
-            self._deleteCost(record)
-            self._deleteSpecification(record)
-            self._deleteItems(record)
-
-    def _deleteCost(self, record):
-        costIter = record.cost_set.iterator()
-
-        while True:
-            try:
-                cost = costIter.next()
-                value = cost.value
-                pk = cost.pk
-                cost.delete()
-                self._log.info("Deteted record: %s with pk: %s", value, pk)
-            except StopIteration:
-                break
-            except Exception as e:
-                self._log.error(str(e), exc_info=True)
-                raise e
-
-    def _deleteSpecification(self, record):
-        specIter = record.specification_set.iterator()
-
-        while True:
-            try:
-                spec = specIter.next()
-                name = spec.name
-                pk = spec.pk
-                spec.delete()
-                self._log.info("Deteted record: %s with pk: %s", name, pk)
-            except StopIteration:
-                break
-            except Exception as e:
-                self._log.error(str(e), exc_info=True)
-                raise e
-
-    def _deleteItems(self, record):
-        try:
-            title = record.title
-            pk = record.pk
-            record.delete()
-            self._log.info("Deteted record: %s with pk: %s", title, pk)
-        except Exception as e:
-            self._log.error(str(e), exc_info=True)
-            raise e
+    def _deleteRecords(self, request, pks):
+        """
+        Queue a job to purge the items, the client polls the job's status.
+        """
+        pks = [int(pk) for pk in pks if pk]
+        job = Job.enqueue('purge', request.user, pks=pks)
+        self._log.info("Queued purge job %s for PKs: %s", job.pk, pks)
+        return job
 
 
 class Location(ViewBase):
@@ -161,8 +107,7 @@ class Location(ViewBase):
             #     context['message'] = ("Confirm your choices then click "
             #                           "submit again.")
 
-            self._log.debug("Context dump for %s: %s",
-                            self.__module__, context)
+            self._dumpContext(context)
             result = json.dumps(context)
         # else:
         #     form = LocationConfigForm()
@@ -17,10 +17,20 @@
 # ISO 3166-2 SUBDIVISION/STATE NAME, ISO 3166-2 PRIMARY LEVEL NAME
 #
 
-from django.db import models
+import json
+import hashlib
+
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.core.cache import cache
 from django.utils.translation import gettext_lazy as _
 
+from inventory.common.caching import ProcessCache, TaggedCache
 from inventory.apps.utils.models import Base
+from inventory.setupenv import getLogger
+
+log = getLogger()
 
 
 class ChooseField:
@@ -64,3 +74,77 @@ class Region(Base):
     class Meta:
         ordering = ('region', 'region_code',)
         unique_together = ('country', 'region',)
+
+
+class RegionLookup:
+    """
+    The regions of each country formatted for the region select box. A
+    country's list is built once and kept in a small process local LRU
+    cache backed by the configured Django cache, both are dropped when a
+    Country or Region is saved or deleted.
+
+    Each entry is a dict of the 'regions' as (label, pk) tuples, an 'etag'
+    of the list and 'last_modified' the newest mtime as a timestamp.
+    """
+    __cache = ProcessCache('region-lookup', maxSize=64)
+    __KEY_PREFIX = 'region-lookup'
+
+    @classmethod
+    def getRegions(self, code):
+        """
+        Return the entry for the country with the ISO 3166-1 two character
+        'code'.
+
+        :raises Country.DoesNotExist: If there is no country with the code.
+        """
+        code = code.strip().upper()
+        return self.__cache.getOrSet(code, lambda: self._loadShared(code))
+
+    @classmethod
+    def _loadShared(self, code):
+        # The generation in the key means that old entries are never read
+        # after an invalidation, the Django cache expires them.
+        key = f"{self.__KEY_PREFIX}:{self.__cache.generation}:{code}"
+
+        try:
+            entry = cache.get(key)
+        except Exception as e:
+            log.warning("Could not read %s from the cache, %s", key, e)
+            entry = None
+
+        if entry is None:
+            entry = self._load(code)
+
+            try:
+                cache.set(key, entry)
+            except Exception as e:
+                log.warning("Could not write %s to the cache, %s", key, e)
+
+        return entry
+
+    @classmethod
+    def _load(self, code):
+        country = Country.objects.get(country_code_2__iexact=code)
+        records = list(country.region_set.values(
+            'id', 'region', 'region_code', 'primary_level', 'mtime'))
+        regions = [(f"{m['region']} ({m['region_code']}: "
+                    f"{m['primary_level']})", m['id']) for m in records]
+        lastModified = max([country.mtime] + [m['mtime'] for m in records])
+        etag = hashlib.md5(json.dumps(regions).encode('utf-8')).hexdigest()
+        return {'regions': regions, 'etag': etag,
+                'last_modified': int(lastModified.timestamp())}
+
+    @classmethod
+    def invalidate(self):
+        self.__cache.invalidate()
+
+
+@receiver((post_save, post_delete), sender=Country)
+@receiver((post_save, post_delete), sender=Region)
+def _invalidateRegionLookup(sender, **kwargs):
+    RegionLookup.invalidate()
+    # Other processes could reload the old rows before the commit.
+    transaction.on_commit(RegionLookup.invalidate)
+
+
+TaggedCache.watch(Country, Region)
@@ -0,0 +1,88 @@
+#
+# reports/tests.py
+#
+
+import datetime
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+
+from inventory.apps.items.models import (
+    Item, Category, Cost, Currency, Specification, Distributor, Manufacturer)
+from inventory.apps.regions.models import Country, Region
+from inventory.apps.reports.views import (
+    view_item_record, view_distributor_record, view_manufacturer_record)
+
+
+class ItemRecordQueryTest(TestCase):
+
+    @classmethod
+    def setUpTestData(self):
+        self.user = User.objects.create_user('tester', password='tester')
+        currency = Currency.objects.create(symbol='$', currency="Dollar",
+                                           user=self.user)
+        distributor = Distributor.objects.create(name="Distributor",
+                                                 user=self.user)
+        manufacturer = Manufacturer.objects.create(name="Manufacturer",
+                                                   user=self.user)
+        self.item = Item.objects.create(
+            title="Resistor", item_number="R-1", distributor=distributor,
+            manufacturer=manufacturer, user=self.user)
+
+        for idx in range(3):
+            category = Category.objects.create(
+                name=f"Category {idx}", parent=None, user=self.user)
+            self.item.categories.add(category)
+            Specification.objects.create(
+                name=f"Spec {idx}", value=f"{idx} k", item=self.item,
+                user=self.user)
+            Cost.objects.create(
+                value=idx, currency=currency, item=self.item,
+                date_acquired=datetime.date(2020, 1, idx + 1),
+                distributor=distributor, manufacturer=manufacturer,
+                user=self.user)
+
+    def test_query_count(self):
+        """
+        The item, then one query each for the location codes, categories,
+        specifications and costs.
+        """
+        context = {}
+
+        with self.assertNumQueries(5):
+            view_item_record._populateRecord(context, str(self.item.pk))
+
+        self.assertEqual(len(context['specset']), 3)
+
+
+class BusinessRecordQueryTest(TestCase):
+
+    @classmethod
+    def setUpTestData(self):
+        self.user = User.objects.create_user('tester', password='tester')
+        country = Country.objects.create(
+            country="United States", country_code_2='US', user=self.user)
+        region = Region.objects.create(
+            country=country, region_code='US-CA', region="California",
+            user=self.user)
+        business = {'name': "Business", 'state': region, 'country': country,
+                    'user': self.user}
+        self.distributor = Distributor.objects.create(**business)
+        self.manufacturer = Manufacturer.objects.create(**business)
+
+    def _populate(self, view, record):
+        """
+        The business with its country and state in one query.
+        """
+        context = {}
+
+        with self.assertNumQueries(1):
+            view._populateRecord(context, str(record.pk))
+
+        self.assertIn("California", context['item'].data['state'])
+
+    def test_distributor_record(self):
+        self._populate(view_distributor_record, self.distributor)
+
+    def test_manufacturer_record(self):
+        self._populate(view_manufacturer_record, self.manufacturer)
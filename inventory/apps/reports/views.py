@@ -8,12 +8,19 @@ from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from django.utils.html import escape
 from django.utils.safestring import mark_safe
-
-from inventory.apps.items.models import Item, Distributor, Manufacturer
+from django.utils.cache import patch_cache_control
+from django.db.models import Prefetch
+
+from inventory.common.caching import TaggedCache
+from inventory.apps.items.models import (
+    Item, Category, Cost, Currency, Specification, Distributor, Manufacturer)
+from inventory.apps.maintenance.models import LocationCodeCategory
+from inventory.apps.regions.models import Country, Region
 from inventory.apps.reports.forms import ItemForm, CostFormSet, BusinessForm
 from inventory.apps.utils.search import (
     ItemSearch, DistributorSearch, ManufacturerSearch)
 from inventory.apps.utils.views import ViewBase
+from inventory.apps.utils.queryplan import QueryBudget
 from inventory.settings import SITE_NAME, getLogger
 
 
@@ -24,6 +31,12 @@ RESPONSE_404 = "404 Not Found"
 
 
 class ReportsBase(ViewBase):
+    # The most queries allowed to populate one record.
+    _QUERY_BUDGET = None
+    # The models a report is built from, a rendered report is cached until
+    # one of them changes. Nothing is cached if this is empty.
+    _CACHE_MODELS = ()
+    _CACHE = TaggedCache('reports')
 
     def __init__(self, log, crumbData=()):
         super().__init__(log)
@@ -50,10 +63,32 @@ class ReportsBase(ViewBase):
             context['breadcrumb'] = {'pages': breadcrumbs, 'img': img}
 
         context['title'] = title
-        self._populateRecord(context, pk)
-        self._log.debug("Context dump for %s: %s", self.__module__, context)
+
+        if self._CACHE_MODELS:
+            # The breadcrumbs are part of the page so they are part of the
+            # key.
+            key = self._CACHE.makeKey(
+                request.user.pk, request.get_full_path(),
+                context.get('breadcrumb'))
+            tags = [TaggedCache.modelTag(model)
+                    for model in self._CACHE_MODELS]
+            content = self._CACHE.getOrSet(
+                key, lambda: self._renderRecord(context, pk), tags)
+        else:
+            content = self._renderRecord(context, pk)
+
+        response = HttpResponse(content)
+        # Keep the page out of the site wide cache, it is only for this user.
+        patch_cache_control(response, private=True)
+        return response
+
+    def _renderRecord(self, context, pk):
+        with QueryBudget(self.__class__.__name__, self._QUERY_BUDGET):
+            self._populateRecord(context, pk)
+
+        self._dumpContext(context)
         tmpl = loader.get_template(self._getRecordHTML())
-        return HttpResponse(tmpl.render(context))
+        return tmpl.render(context)
 
     def _populateRecord(self, context, pk):
         msg = "_populateRecord() must be defined in the subclass."
@@ -68,22 +103,45 @@ class ReportsBase(ViewBase):
         context['siteName'] = SITE_NAME
         context['name'] = name
         context['message'] = message
-        self._log.debug("Context dump for %s: %s", self.__module__, context)
+        self._dumpContext(context)
         return loader.get_template('error.html')
 
 
 class ItemRecord(ReportsBase):
+    # The item with its distributor and manufacturer, then one query each
+    # for the location codes, categories, specifications and costs.
+    _QUERY_BUDGET = 5
+    _CACHE_MODELS = (Item, Category, LocationCodeCategory, Specification,
+                     Cost, Currency, Distributor, Manufacturer)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
     def _populateRecord(self, context, pk):
         context['edit'] = "/admin/items/item/%s/" % pk
-        record = Item.objects.get(pk=int(pk))
+        record = self._getRecord(int(pk))
         context['item'] = self._getItemForm(record)
         context['specset'] = self._getSpecForms(record)
         context['costset'] = self._getCostForms(record)
 
+    def _getRecord(self, pk):
+        """
+        Fetch the item and everything shown in its report with a fixed
+        number of queries no matter how many costs or specifications it
+        has.
+        """
+        codes = LocationCodeCategory.objects.only('pk', 'path')
+        categories = Category.objects.only('pk', 'path')
+        costs = Cost.objects.select_related(
+            'currency', 'distributor', 'manufacturer').order_by(
+            'invoice_number', 'date_acquired')
+        return Item.objects.select_related(
+            'distributor', 'manufacturer').prefetch_related(
+            Prefetch('location_code', queryset=codes),
+            Prefetch('categories', queryset=categories),
+            'specification_set',
+            Prefetch('cost_set', queryset=costs)).get(pk=pk)
+
     def _getRecordHTML(self):
         return 'itemRecord.html'
 
@@ -117,50 +175,42 @@ class ItemRecord(ReportsBase):
         return ItemForm(items)
 
     def _getSpecForms(self, record):
-        specIter = record.specification_set.iterator()
         specList = []
 
-        while True:
-            try:
-                spec = specIter.next()
-                specs = (escape(spec.name + ':'), escape(spec.value))
-                specList.append(specs)
-            except StopIteration:
-                break
+        for spec in record.specification_set.all():
+            specList.append((escape(spec.name + ':'), escape(spec.value)))
 
         return specList
 
     def _getCostForms(self, record):
-        costIter = record.cost_set.iterator()
         costList = []
 
-        while True:
-            try:
-                cost = costIter.next()
-                costs = {}
-                costs['value'] = escape(cost.value)
-                costs['currency'] = "%s (%s)" % (
-                    escape(cost.currency.symbol),
-                    escape(cost.currency.currency))
-                costs['date_acquired'] = cost.date_acquired
-                dist = cost.distributor
+        for cost in record.cost_set.all():
+            costs = {}
+            costs['value'] = escape(cost.value)
+            costs['currency'] = "%s (%s)" % (
+                escape(cost.currency.symbol),
+                escape(cost.currency.currency))
+            costs['date_acquired'] = cost.date_acquired
+            dist = cost.distributor
 
-                if dist:
-                    costs['distributor'] = escape(dist.name)
+            if dist:
+                costs['distributor'] = escape(dist.name)
 
-                mfg = cost.manufacturer
+            mfg = cost.manufacturer
 
-                if mfg:
-                    costs['manufacturer'] = escape(mfg.name)
+            if mfg:
+                costs['manufacturer'] = escape(mfg.name)
 
-                costList.append(costs)
-            except StopIteration:
-                break
+            costList.append(costs)
 
         return CostFormSet(initial=costList, prefix='cost')
 
 
 class BusinessRecordBase(ReportsBase):
+    # The country and state are joined to the business.
+    _QUERY_BUDGET = 1
+    _CACHE_MODELS = (Distributor, Manufacturer, Country, Region)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -192,7 +242,8 @@ class DistributorRecord(BusinessRecordBase):
     def _populateRecord(self, context, pk):
         context['edit'] = "/admin/items/distributor/%s/" % pk
         context['business'] = "Distributor"
-        record = Distributor.objects.get(pk=int(pk))
+        record = Distributor.objects.select_related('country', 'state').get(
+            pk=int(pk))
         context['item'] = self._getBusinessForm(record)
 
 
@@ -204,7 +255,8 @@ class ManufacturerRecord(BusinessRecordBase):
     def _populateRecord(self, context, pk):
         context['edit'] = "/admin/items/manufacturer/%s/" % pk
         context['business'] = "Manufacturer"
-        record = Manufacturer.objects.get(pk=int(pk))
+        record = Manufacturer.objects.select_related('country', 'state').get(
+            pk=int(pk))
         context['item'] = self._getBusinessForm(record)
 
 
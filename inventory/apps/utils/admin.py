@@ -2,11 +2,31 @@
 # utils/admin.py
 #
 
+import json
 import datetime
 
 from django.contrib import admin
-from django.core.exceptions import PermissionDenied
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList, PAGE_VAR
+from django.core import signing
+from django.core.exceptions import PermissionDenied, FieldDoesNotExist
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.db.models.constants import LOOKUP_SEP
 from django.forms.utils import ErrorList
+from django.utils.functional import cached_property
+
+from inventory.settings import (
+    ADMIN_ESTIMATE_THRESHOLD, ADMIN_COUNT_LIMIT, getLogger)
+
+log = getLogger()
+
+# GET arguments handled by BaseAdmin, they are removed before the
+# ChangeList sees them.
+CURSOR_VAR = 'cursor'
+EXACT_COUNT_VAR = 'exact_count'
 
 # This fixes the empty list '[]' in the admin issue in production environments.
 ErrorList.__str__ = lambda self: '' if not self else super(
@@ -65,7 +85,268 @@ class ReadPermissionModelAdmin(admin.ModelAdmin):
     #        extra_context=extra_context)
 
 
+def estimateRowCount(model, using='default'):
+    """
+    Return the number of rows in the model's table from the database's
+    statistics or None if the database does not keep any.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+
+    if connection.vendor == 'mysql':
+        sql = ("SELECT TABLE_ROWS FROM information_schema.TABLES "
+               "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s")
+    elif connection.vendor == 'postgresql':
+        sql = "SELECT reltuples::bigint FROM pg_class WHERE relname = %s"
+    else:
+        return None
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [table])
+            row = cursor.fetchone()
+    except Exception as e:
+        log.warning("Could not estimate the rows in %s, %s", table, e)
+        return None
+
+    # PostgreSQL returns -1 for a table that has never been analyzed.
+    return row[0] if row and row[0] is not None and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Avoids COUNT(*) on large tables. When the table has more rows than
+    ADMIN_ESTIMATE_THRESHOLD the table statistics are used for an
+    unfiltered list and a filtered list is counted up to ADMIN_COUNT_LIMIT.
+    'estimated' is True when the count is not exact.
+    """
+
+    def __init__(self, *args, exact=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.exact = exact
+        self.estimated = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+
+        if self.exact or not isinstance(queryset, QuerySet):
+            return super().count
+
+        estimate = estimateRowCount(queryset.model, queryset.db)
+
+        if estimate is None or estimate < ADMIN_ESTIMATE_THRESHOLD:
+            return super().count
+
+        if not queryset.query.where:
+            self.estimated = True
+            return estimate
+
+        count = queryset.order_by()[:ADMIN_COUNT_LIMIT].count()
+        self.estimated = count >= ADMIN_COUNT_LIMIT
+        return count
+
+
+class _CursorSerializer:
+    """
+    Lets dates and decimals be signed in a cursor.
+    """
+    def dumps(self, obj):
+        return json.dumps(obj, cls=DjangoJSONEncoder,
+                          separators=(',', ':')).encode('latin-1')
+
+    def loads(self, data):
+        return json.loads(data.decode('latin-1'))
+
+
+class CursorChangeList(ChangeList):
+    """
+    Pages through the changelist with a signed cursor holding the sort
+    values of the last row, or of the first row for the previous page, so
+    each page is found through the ordering's index instead of reading and
+    skipping all the rows before it with OFFSET. Only used when every
+    column in the ordering is a non null field on the model or a required
+    foreign key and the ordering ends in a unique column, otherwise the
+    normal page numbers are shown.
+    """
+    __SALT = 'inventory.admin.cursor'
+
+    def get_results(self, request):
+        super().get_results(request)
+        self.count_estimated = getattr(self.paginator, 'estimated', False)
+        self.exact_count_url = None
+        self.cursor_paging = False
+        self.first_page_url = None
+        self.previous_cursor_url = None
+        self.next_cursor_url = None
+
+        if self.count_estimated:
+            self.exact_count_url = self.get_query_string(
+                {EXACT_COUNT_VAR: 1})
+
+        fields = self._getKeysetFields()
+
+        if (fields is None or not self.multi_page
+                or (self.show_all and self.can_show_all)):
+            return
+
+        self.cursor_paging = True
+        names = [name for name, desc in fields]
+        cursor = getattr(request, '_adminCursor', None)
+        backward = hasPrevious = False
+
+        if cursor:
+            values, backward = self._loadCursor(cursor, names)
+            queryset = self.queryset.filter(self._getKeysetQuery(
+                fields, values, backward))
+            self.first_page_url = self.get_query_string(remove=[PAGE_VAR])
+
+            if backward:
+                # Walk back through the index then show the page in the
+                # list's own order, one more row tells if there is a page
+                # before it.
+                pks = list(queryset.reverse().values_list(
+                    'pk', flat=True)[:self.list_per_page + 1])
+                hasPrevious = len(pks) > self.list_per_page
+                self.result_list = self.queryset.filter(
+                    pk__in=pks[:self.list_per_page])
+            else:
+                hasPrevious = True
+                self.result_list = queryset[:self.list_per_page]
+
+        rows = list(self.result_list)
+
+        if not rows:
+            return
+
+        keys = self._getKeyValues(names, (rows[0].pk, rows[-1].pk))
+
+        if hasPrevious:
+            self.previous_cursor_url = self.get_query_string(
+                {CURSOR_VAR: self._dumpCursor(names, keys[rows[0].pk],
+                                              backward=True)}, [PAGE_VAR])
+
+        if backward or len(rows) == self.list_per_page:
+            self.next_cursor_url = self.get_query_string(
+                {CURSOR_VAR: self._dumpCursor(names, keys[rows[-1].pk])},
+                [PAGE_VAR])
+
+    def _getKeyValues(self, names, pks):
+        """
+        Return the sort values of the rows with the primary keys in 'pks'
+        keyed by primary key.
+        """
+        return {row[0]: row[1:] for row in self.queryset.order_by().filter(
+            pk__in=pks).values_list('pk', *names)}
+
+    def _getKeysetFields(self):
+        fields = []
+        unique = False
+
+        for item in self.queryset.query.order_by:
+            if not isinstance(item, str) or item == '?':
+                return None
+
+            name = item.lstrip('-')
+
+            if name == 'pk':
+                name = self.lookup_opts.pk.name
+
+            field = self._getKeysetField(name)
+
+            if field is None:
+                return None
+
+            unique = name == self.lookup_opts.pk.name or (
+                field.unique and field.model is self.model)
+            fields.append((name, item.startswith('-')))
+
+        return fields if fields and unique else None
+
+    def _getKeysetField(self, name):
+        opts = self.lookup_opts
+        parts = name.split(LOOKUP_SEP)
+
+        for idx, part in enumerate(parts):
+            try:
+                field = opts.get_field(part)
+            except FieldDoesNotExist:
+                return None
+
+            last = idx == len(parts) - 1
+
+            if (field.many_to_many or field.one_to_many
+                    or getattr(field, 'null', True)
+                    or (field.is_relation and last)
+                    or (not field.is_relation and not last)):
+                return None
+
+            if field.is_relation:
+                opts = field.related_model._meta
+
+        return field
+
+    def _getKeysetQuery(self, fields, values, backward=False):
+        """
+        Return a Q object for the rows after 'values' in the ordering, or
+        before them if 'backward' is True.
+        """
+        query = Q()
+        equal = {}
+
+        for (name, desc), value in zip(fields, values):
+            lookup = f"{name}__{'lt' if desc != backward else 'gt'}"
+            query |= Q(**equal, **{lookup: value})
+            equal[name] = value
+
+        return query
+
+    def _dumpCursor(self, names, values, backward=False):
+        return signing.dumps([names, list(values), backward],
+                             salt=self.__SALT, serializer=_CursorSerializer,
+                             compress=True)
+
+    def _loadCursor(self, cursor, names):
+        """
+        Return the sort values in a cursor and True if it points back to
+        the page before them.
+        """
+        try:
+            cursorNames, values, backward = signing.loads(
+                cursor, salt=self.__SALT, serializer=_CursorSerializer)
+        except (signing.BadSignature, ValueError, TypeError):
+            raise IncorrectLookupParameters("Invalid cursor.")
+
+        if cursorNames != names:
+            raise IncorrectLookupParameters("The ordering has changed.")
+
+        return values, bool(backward)
+
+
 class BaseAdmin(ReadPermissionModelAdmin):
+    paginator = EstimatedCountPaginator
+    # The full count is a second COUNT(*) on every page.
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return CursorChangeList
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        return self.paginator(
+            queryset, per_page, orphans, allow_empty_first_page,
+            exact=getattr(request, '_adminExactCount', False))
+
+    def changelist_view(self, request, extra_context=None):
+        # The ChangeList rejects GET arguments it does not know.
+        if CURSOR_VAR in request.GET or EXACT_COUNT_VAR in request.GET:
+            request.GET = request.GET.copy()
+            request._adminCursor = request.GET.pop(CURSOR_VAR, [None])[-1]
+            request._adminExactCount = bool(
+                request.GET.pop(EXACT_COUNT_VAR, None))
+
+        return super().changelist_view(request, extra_context=extra_context)
+
     def save_model(self, request, obj, form, change):
         obj.user = request.user
 
@@ -74,3 +355,20 @@ class BaseAdmin(ReadPermissionModelAdmin):
             obj.ctime = datetime.datetime.now()
 
         super().save_model(request, obj, form, change)
+
+
+class TreeChangeList(CursorChangeList):
+    """
+    Loads the parents of every row on the page with one query, the model
+    must inherit TreeMixin.
+    """
+    def get_results(self, request):
+        super().get_results(request)
+        # Iterating the queryset fills its result cache, which is what the
+        # template uses.
+        self.model.prefetchParents(self.result_list)
+
+
+class TreeAdmin(BaseAdmin):
+    def get_changelist(self, request, **kwargs):
+        return TreeChangeList
@@ -23,3 +23,13 @@ class InventoryException(Exception):
 class DoesNotExist(InventoryException):
     def __init__(self, msg):
         super().__init__(msg)
+
+
+class QueryBudgetExceeded(InventoryException):
+    def __init__(self, msg):
+        super().__init__(msg)
+
+
+class JobCancelled(InventoryException):
+    def __init__(self, msg):
+        super().__init__(msg)
@@ -0,0 +1,235 @@
+#
+# utils/fulltext.py
+#
+# A text field with a full text index and the lookup and rank expression
+# that search it.
+#
+# MySQL uses a FULLTEXT index on the column. SQLite uses an FTS5 table
+# named '<db_table>_fts' kept in step with the model's table by triggers,
+# its rowid is the model's primary key. Any other database, or a SQLite
+# without FTS5, falls back to matching every word with LIKE.
+#
+
+import re
+
+from django.db import models
+from django.db.models import Lookup, Func
+
+from inventory.setupenv import getLogger
+
+log = getLogger()
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def searchWords(text):
+    """
+    Split what a user typed into the words to search for, everything else
+    is dropped so that it cannot be read as search operators.
+    """
+    return WORD_RE.findall(text or '')
+
+
+def ftsTableName(model):
+    return f"{model._meta.db_table}_fts"
+
+
+def createIndex(schemaEditor, model, fieldName):
+    """
+    Create the full text index for 'fieldName' of 'model', this is called
+    from a RunPython migration operation.
+    """
+    connection = schemaEditor.connection
+    qn = schemaEditor.quote_name
+    table = model._meta.db_table
+    column = model._meta.get_field(fieldName).column
+    pk = model._meta.pk.column
+
+    if connection.vendor == 'mysql':
+        schemaEditor.execute(
+            f"ALTER TABLE {qn(table)} ADD FULLTEXT INDEX "
+            f"{qn(table + '_' + column + '_ft')} ({qn(column)})")
+    elif connection.vendor == 'sqlite':
+        fts = qn(ftsTableName(model))
+        names = {'fts': fts, 'table': qn(table), 'col': qn(column),
+                 'pk': qn(pk)}
+
+        try:
+            schemaEditor.execute(
+                f"CREATE VIRTUAL TABLE {fts} USING fts5({qn(column)}, "
+                f"content='{table}', content_rowid='{pk}')")
+        except Exception as e:
+            log.warning("FTS5 is not available, %s will be searched with "
+                        "LIKE, %s", table, e)
+            return
+
+        for name, sql in (
+            ('ai', "AFTER INSERT ON {table} BEGIN "
+                   "INSERT INTO {fts} (rowid, {col}) "
+                   "VALUES (new.{pk}, new.{col}); END"),
+            ('ad', "AFTER DELETE ON {table} BEGIN "
+                   "INSERT INTO {fts} ({fts}, rowid, {col}) "
+                   "VALUES ('delete', old.{pk}, old.{col}); END"),
+            ('au', "AFTER UPDATE ON {table} BEGIN "
+                   "INSERT INTO {fts} ({fts}, rowid, {col}) "
+                   "VALUES ('delete', old.{pk}, old.{col}); "
+                   "INSERT INTO {fts} (rowid, {col}) "
+                   "VALUES (new.{pk}, new.{col}); END")):
+            trigger = qn(f"{ftsTableName(model)}_{name}")
+            schemaEditor.execute(f"CREATE TRIGGER {trigger} " +
+                                 sql.format(**names))
+
+        schemaEditor.execute(
+            f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+def dropIndex(schemaEditor, model, fieldName):
+    connection = schemaEditor.connection
+    qn = schemaEditor.quote_name
+    table = model._meta.db_table
+    column = model._meta.get_field(fieldName).column
+
+    if connection.vendor == 'mysql':
+        schemaEditor.execute(
+            f"ALTER TABLE {qn(table)} DROP INDEX "
+            f"{qn(table + '_' + column + '_ft')}")
+    elif connection.vendor == 'sqlite':
+        for name in ('ai', 'ad', 'au'):
+            trigger = qn(f"{ftsTableName(model)}_{name}")
+            schemaEditor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+        schemaEditor.execute(
+            f"DROP TABLE IF EXISTS {qn(ftsTableName(model))}")
+
+
+_FTS_TABLES = {}
+
+
+def hasFTSTable(connection, model):
+    """
+    Return True if the FTS5 table for 'model' exists on this SQLite
+    database.
+    """
+    key = (connection.alias, model._meta.db_table)
+
+    if key not in _FTS_TABLES:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                           "AND name = %s", [ftsTableName(model)])
+            _FTS_TABLES[key] = cursor.fetchone() is not None
+
+    return _FTS_TABLES[key]
+
+
+class FullTextField(models.TextField):
+    """
+    A TextField that can be searched with the 'fulltext' lookup, the index
+    itself is created by createIndex() in a migration.
+    """
+    pass
+
+
+class _FullTextSQL:
+    """
+    Builds the vendor specific SQL shared by the lookup and the rank.
+    """
+
+    def _columns(self, compiler, connection, lhs):
+        qn = compiler.quote_name_unless_alias
+        model = lhs.target.model
+        column = f"{qn(lhs.alias)}.{qn(lhs.target.column)}"
+        pk = f"{qn(lhs.alias)}.{qn(model._meta.pk.column)}"
+        return model, column, pk
+
+    def _mysqlQuery(self, words):
+        return ' '.join(f"+{word}*" for word in words)
+
+    def _sqliteQuery(self, words):
+        return ' '.join(f'"{word}"*' for word in words)
+
+
+class FullTextMatch(_FullTextSQL, Lookup):
+    """
+    Matches rows that contain every word in the search text, the last
+    characters of each word may be missing.
+    """
+    lookup_name = 'fulltext'
+    prepare_rhs = False
+
+    def _words(self):
+        return searchWords(self.rhs)
+
+    def as_mysql(self, compiler, connection):
+        model, column, pk = self._columns(compiler, connection, self.lhs)
+        words = self._words()
+
+        if not words:
+            return "0 = 1", []
+
+        return (f"MATCH ({column}) AGAINST (%s IN BOOLEAN MODE)",
+                [self._mysqlQuery(words)])
+
+    def as_sqlite(self, compiler, connection):
+        model, column, pk = self._columns(compiler, connection, self.lhs)
+        words = self._words()
+
+        if not words:
+            return "0 = 1", []
+
+        if not hasFTSTable(connection, model):
+            return self.as_sql(compiler, connection)
+
+        fts = compiler.quote_name_unless_alias(ftsTableName(model))
+        return (f"{pk} IN (SELECT rowid FROM {fts} WHERE {fts} MATCH %s)",
+                [self._sqliteQuery(words)])
+
+    def as_sql(self, compiler, connection):
+        model, column, pk = self._columns(compiler, connection, self.lhs)
+        words = self._words()
+
+        if not words:
+            return "0 = 1", []
+
+        lhs = connection.ops.lookup_cast('icontains', 'TextField') % column
+        like = connection.operators['icontains'] % '%s'
+        sql = ' AND '.join([f"{lhs} {like}"] * len(words))
+        params = [f"%{connection.ops.prep_for_like_query(word)}%"
+                  for word in words]
+        return sql, params
+
+
+FullTextField.register_lookup(FullTextMatch)
+
+
+class FullTextRank(_FullTextSQL, Func):
+    """
+    How well a row matches the search text, higher is better. Use it on
+    the same column as a 'fulltext' filter.
+    """
+    output_field = models.FloatField()
+
+    def __init__(self, expression, text, **extra):
+        super().__init__(expression, **extra)
+        self.words = searchWords(text)
+
+    def _lhs(self):
+        return self.source_expressions[0]
+
+    def as_mysql(self, compiler, connection):
+        model, column, pk = self._columns(compiler, connection, self._lhs())
+        return (f"MATCH ({column}) AGAINST (%s IN BOOLEAN MODE)",
+                [self._mysqlQuery(self.words)])
+
+    def as_sqlite(self, compiler, connection):
+        model, column, pk = self._columns(compiler, connection, self._lhs())
+
+        if not self.words or not hasFTSTable(connection, model):
+            return self.as_sql(compiler, connection)
+
+        fts = compiler.quote_name_unless_alias(ftsTableName(model))
+        # bm25() is lower for a better match.
+        return (f"(SELECT -bm25({fts}) FROM {fts} WHERE {fts} MATCH %s "
+                f"AND {fts}.rowid = {pk})", [self._sqliteQuery(self.words)])
+
+    def as_sql(self, compiler, connection, **extra):
+        return "0", []
@@ -4,138 +4,147 @@
 
 import sys
 import os
-import cPickle
+import json
 import time
-import codecs
-import logging
+import fcntl
+import tempfile
+import contextlib
 import logging.handlers
 
+from inventory.common.logqueue import BatchFlushMixin
+
+
+class NewTimedRotatingFileHandler(BatchFlushMixin,
+                                  logging.handlers.TimedRotatingFileHandler):
+    """
+    A TimedRotatingFileHandler that can be shared by many processes, e.g.
+    the Apache workers, writing to the same file. The next rollover time
+    is kept in a JSON state file next to the log so it survives restarts,
+    and the rollover is done under an exclusive fcntl lock so only the
+    first process to reach the rollover time rotates the file. The others
+    find the new time in the state file and reopen the new log file.
+    """
 
-class NewTimedRotatingFileHandler(logging.handlers.TimedRotatingFileHandler):
     def __init__(self, persistFile, filename, when='h', interval=1,
-                 backupCount=0, encoding=None):
-        self.persistFile = persistFile
-        logging.handlers.TimedRotatingFileHandler.__init__(
-            self, filename, when=when, interval=interval,
-            backupCount=backupCount)
+                 backupCount=0, encoding=None, delay=False, utc=False):
+        """
+        NewTimedRotatingFileHandler constructor.
 
-        data = self.getPersistentData()
-        currentTime = int(time.time())
-        # Calculated last roll time.
-        lastRoll = self.rolloverAt - self.interval
+        :param str persistFile: The path of the JSON state file, a lock
+                                file with '.lock' added to this path is
+                                created next to it.
+        :param str filename: The path of the log file.
+        The other arguments are the same as TimedRotatingFileHandler's.
+        """
+        self.persistFile = persistFile
+        self.lockFile = f"{persistFile}.lock"
+        super().__init__(filename, when=when, interval=interval,
+                         backupCount=backupCount, encoding=encoding,
+                         delay=delay, utc=utc)
 
-        if isinstance(data, dict):
-            rolloverAt = data.get('rolloverAt', 0)
-            lastRoll = data.get('lastRoll', 0)
+        with self._rolloverLock():
+            data = self.getPersistentData()
 
-            if lastRoll < (currentTime - self.interval):
-                self.rolloverAt = rolloverAt
-            else:
+            if data is None:
+                # Calculated last roll time.
+                lastRoll = self.rolloverAt - self.interval
                 self.setPersistentData(self.rolloverAt, lastRoll=lastRoll)
-        else:
-            self.setPersistentData(self.rolloverAt, lastRoll=lastRoll)
-
-        msg = (f"Current persistent log file, rolloverAt: {self.rolloverAt}, "
-               f"lastRoll: {lastRoll}")
-        print(msg, file=sys.stderr)
+            else:
+                # A time already past makes the next record roll the file.
+                self.rolloverAt = data['rolloverAt']
 
-    def getPersistentData(self):
-        fobj = None
-        result = None
+    @contextlib.contextmanager
+    def _rolloverLock(self):
+        with open(self.lockFile, 'a') as fobj:
+            fcntl.flock(fobj.fileno(), fcntl.LOCK_EX)
 
-        if os.path.isfile(self.persistFile):
-            # Get the persisted rollover time from a file.
             try:
-                fobj = open(self.persistFile, "r")
-                p = cPickle.Unpickler(fobj)
-                result = p.load()
-                fobj.close()
-            except Exception as e:
-                if fobj:
-                    fobj.close()
-
-                raise e
-
-            if isinstance(result, dict):
-                msg = ("getPersistentData(): rolloverAt: "
-                       f"{result.get('rolloverAt')}, lastRoll: "
-                       f"{result.get('lastRoll')}")
-                print(msg, file=sys.stderr)
+                yield
+            finally:
+                fcntl.flock(fobj.fileno(), fcntl.LOCK_UN)
+
+    def getPersistentData(self):
+        """
+        Return the persisted state as a dict with the 'rolloverAt' and
+        'lastRoll' times, or None if the state file is missing or bad.
+        """
+        try:
+            with open(self.persistFile, 'r', encoding='utf-8') as fobj:
+                result = json.load(fobj)
+
+            result = {'rolloverAt': int(result['rolloverAt']),
+                      'lastRoll': int(result.get('lastRoll', 0))}
+        except FileNotFoundError:
+            result = None
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"getPersistentData(): Ignoring bad state file "
+                  f"{self.persistFile}, {e}", file=sys.stderr)
+            result = None
 
         return result
 
     def setPersistentData(self, rolloverAt, lastRoll=0):
-        fobj = None
-        data = {'rolloverAt': rolloverAt, 'lastRoll': lastRoll}
+        """
+        Persist the rollover times. The state is written to a temporary
+        file that is renamed over the old one so a reader never sees a
+        partly written file.
+        """
+        data = {'rolloverAt': int(rolloverAt), 'lastRoll': int(lastRoll)}
+        path = os.path.dirname(os.path.abspath(self.persistFile))
+        fd, tmpName = tempfile.mkstemp(dir=path, prefix='.rollover-')
 
-        # Persist the rollover time to disk.
         try:
-            fobj = open(self.persistFile, "w")
-            p = cPickle.Pickler(fobj)
-            p.dump(data)
-            fobj.close()
-        except Exception as e:
-            if fobj:
-                fobj.close()
+            with os.fdopen(fd, 'w', encoding='utf-8') as fobj:
+                json.dump(data, fobj)
+                fobj.flush()
+                os.fsync(fobj.fileno())
 
-            raise e
+            os.replace(tmpName, self.persistFile)
+        except Exception:
+            with contextlib.suppress(OSError):
+                os.unlink(tmpName)
 
-        msg = (f"setPersistentData(): rolloverAt: {rolloverAt}, "
-               f"lastRoll: {lastRoll}")
-        print(msg, file=sys.stderr)
+            raise
 
     def shouldRollover(self, record):
         """
-        Determine if rollover should occur. First check that the
-        persisted object should override the memory object.
+        Determine if rollover should occur, only the time kept in memory is
+        checked here so the state file is not read for every log event.
+        doRollover() decides if this process must actually rotate the file.
 
         The argument 'record' is not used, as we are just comparing times,
         but it is needed so the method signatures are the same
         """
-        result = False
-        currentTime = int(time.time())
+        return int(time.time()) >= self.rolloverAt
 
-        # Check the memory value self.rolloverAt so getPersistentData()
-        # is not called for every log event.
-        if currentTime >= self.rolloverAt:
+    def doRollover(self):
+        with self._rolloverLock():
             data = self.getPersistentData()
+            currentTime = int(time.time())
 
-            if isinstance(data, dict):
-                rolloverAt = data.get('rolloverAt', 0)
-                lastRoll = data.get('lastRoll', 0)
-
-                # Check if the last roll time plus the interval is greater
-                # than the current time. This means we don't need to roll yet.
-                if (lastRoll + self.interval) > currentTime:
-                    # No need to roll, but we need to drop the handle to the
-                    # old file and get the handle to the new file.
+            if data is not None and data['rolloverAt'] > currentTime:
+                # Another process has already rotated the file, drop the
+                # handle to the old file and append to the new one.
+                if self.stream:
                     self.stream.close()
+                    self.stream = None
 
-                    if self.encoding:
-                        self.stream = codecs.open(self.baseFilename, 'w',
-                                                  self.encoding)
-                    else:
-                        self.stream = open(self.baseFilename, 'w')
-
-                    self.rolloverAt = rolloverAt
-                else:
-                    # We have missed the roll time, so roll now.
-                    msg = (f"Should roll, lastRoll({lastRoll}) + "
-                           f"self.interval({self.interval}) "
-                           f"<= currentTime({currentTime})")
-                    print(msg, file=sys.stderr)
-                    result = True
-            else:
-                # Bad data in the persist file or some jerk blew the file
-                # away, so we just believe the memory value in self.rolloverAt.
-                msg = ("Should roll, wrong data type in or missing "
-                       "persist file.")
-                print(msg, file=sys.stderr)
-                result = True
+                if not self.delay:
+                    self.stream = self._open()
 
-        return result
+                self.rolloverAt = data['rolloverAt']
+                return
 
-    def doRollover(self):
-        lastRoll = self.rolloverAt
-        logging.handlers.TimedRotatingFileHandler.doRollover(self)
-        self.setPersistentData(self.rolloverAt, lastRoll=lastRoll)
+            if data is not None:
+                # Another process may have rotated the file since this one
+                # last wrote to it, the backup is named from rolloverAt so
+                # it must be the current period's or that process's backup
+                # is overwritten.
+                self.rolloverAt = data['rolloverAt']
+
+            lastRoll = self.rolloverAt
+            super().doRollover()
+            self.setPersistentData(self.rolloverAt, lastRoll=lastRoll)
+            print(f"Rolled over {self.baseFilename}, rolloverAt: "
+                  f"{self.rolloverAt}, lastRoll: {lastRoll}",
+                  file=sys.stderr)
@@ -4,7 +4,9 @@
 # Base model
 #
 
-from django.db import models
+import threading
+
+from django.db import models, connection, transaction
 from django.contrib.auth.models import User
 
 
@@ -16,3 +18,224 @@ class Base(models.Model):
 
     class Meta:
         abstract = True
+
+
+class PendingUpdates:
+    """
+    The primary keys of the records changed in the current transaction
+    that an update function must see, the function is called once with
+    all of them when the transaction commits.
+
+    PendingUpdates.add(ItemSearchIndex.update, [item.pk])
+
+    Keys are merged into the batch already scheduled in the transaction,
+    so the keys added in a savepoint that is rolled back are still passed
+    to the function if the batch was scheduled before the savepoint, the
+    function must cope with records that did not change. A batch scheduled
+    in a savepoint or transaction that is rolled back is dropped with it.
+    """
+    __local = threading.local()
+
+    def __init__(self, update, pks):
+        self.update = update
+        self.pks = pks
+        self._hooks = None
+
+    @classmethod
+    def add(self, update, pks):
+        """
+        Call 'update' with 'pks' when the current transaction commits, now
+        if there is no transaction.
+
+        :param update: A function taking an iterable of primary keys.
+        :param pks: An iterable of primary keys.
+        """
+        pks = set(pks)
+
+        if not pks:
+            return
+
+        connection = transaction.get_connection()
+        pending = getattr(self.__local, 'pending', None)
+
+        if pending is None:
+            pending = self.__local.pending = {}
+
+        batch = pending.get(update)
+
+        if batch is not None and batch._isScheduled(connection):
+            batch.pks |= pks
+        else:
+            # The first change in this transaction or the transaction the
+            # last batch was added in was rolled back.
+            batch = pending[update] = self(update, pks)
+            transaction.on_commit(batch)
+            batch._hooks = connection.run_on_commit
+
+    def _isScheduled(self, connection):
+        # Django replaces its list of commit hooks when a savepoint or the
+        # transaction is rolled back, so the list only needs searching
+        # after a rollback.
+        hooks = connection.run_on_commit
+
+        if hooks is not self._hooks:
+            if not any(func is self for sids, func, robust in hooks):
+                return False
+
+            self._hooks = hooks
+
+        return True
+
+    def __call__(self):
+        pending = self.__local.pending
+
+        if pending.get(self.update) is self:
+            del pending[self.update]
+
+        self.update(self.pks)
+
+
+class TreeMixin:
+    """
+    Tree queries for models with a self referencing 'parent' foreign key.
+    Recursive common table expressions are used so that a whole chain of
+    parents or a whole subtree is found with one query no matter how deep
+    the tree is.
+
+    The model must set '_PATH_FIELD' to the field whose values are joined
+    into its 'path' field and define '_getPathSeparator()'.
+    """
+    _PATH_FIELD = None
+    _MAX_DEPTH = 100
+    _BATCH_SIZE = 500
+    __PARENTS_CACHE = '_treeParentsCache'
+
+    @classmethod
+    def _treeSQLNames(self):
+        qn = connection.ops.quote_name
+        return {'table': qn(self._meta.db_table),
+                'pk': qn(self._meta.pk.column),
+                'parent': qn(self._meta.get_field('parent').column)}
+
+    @classmethod
+    def getParents(self, node):
+        """
+        Return a list of the ancestors of 'node' starting with the root.
+        The node itself does not need to be saved, only its parent.
+        """
+        parentId, parents = getattr(node, self.__PARENTS_CACHE, (None, None))
+
+        if parents is None or parentId != node.parent_id:
+            parents = self._queryParents(node.parent_id)
+
+        return list(parents)
+
+    @classmethod
+    def _queryParents(self, parentId):
+        if not parentId:
+            return []
+
+        sql = ("WITH RECURSIVE ancestors (id, depth) AS ("
+               "SELECT {pk}, 1 FROM {table} WHERE {pk} = %s "
+               "UNION ALL "
+               "SELECT t.{parent}, a.depth + 1 FROM {table} t "
+               "INNER JOIN ancestors a ON t.{pk} = a.id "
+               "WHERE t.{parent} IS NOT NULL AND a.depth < %s) "
+               "SELECT t.* FROM {table} t "
+               "INNER JOIN ancestors a ON t.{pk} = a.id "
+               "ORDER BY a.depth DESC").format(**self._treeSQLNames())
+        return list(self.objects.raw(sql, [parentId, self._MAX_DEPTH]))
+
+    @classmethod
+    def prefetchParents(self, nodes):
+        """
+        Find the ancestors of all the nodes with one query per batch and
+        store them on each node so that getParents() does not need to hit
+        the database.
+
+        :param nodes: An iterable of nodes, usually a queryset.
+        :returns: A list of the nodes.
+        """
+        nodes = list(nodes)
+        parentIds = list({node.parent_id for node in nodes
+                          if node.parent_id})
+        ancestors = {}
+        sql = ("WITH RECURSIVE ancestors (id) AS ("
+               "SELECT {pk} FROM {table} WHERE {pk} IN ({params}) "
+               "UNION "
+               "SELECT t.{parent} FROM {table} t "
+               "INNER JOIN ancestors a ON t.{pk} = a.id "
+               "WHERE t.{parent} IS NOT NULL) "
+               "SELECT t.* FROM {table} t "
+               "INNER JOIN ancestors a ON t.{pk} = a.id")
+
+        for idx in range(0, len(parentIds), self._BATCH_SIZE):
+            batch = parentIds[idx:idx + self._BATCH_SIZE]
+            params = ', '.join(['%s'] * len(batch))
+            query = sql.format(params=params, **self._treeSQLNames())
+            ancestors.update((node.pk, node)
+                             for node in self.objects.raw(query, batch))
+
+        for node in nodes:
+            parents = []
+            parentId = node.parent_id
+
+            while parentId in ancestors and len(parents) < self._MAX_DEPTH:
+                parent = ancestors[parentId]
+                parents.append(parent)
+                parentId = parent.parent_id
+
+            parents.reverse()
+            setattr(node, self.__PARENTS_CACHE, (node.parent_id, parents))
+
+        return nodes
+
+    @classmethod
+    def getDescendants(self, node):
+        """
+        Return a list of all the descendants of 'node' ordered by their
+        depth below it, every parent comes before its children. The depth
+        is set on each descendant as 'tree_depth'.
+        """
+        sql = ("WITH RECURSIVE descendants (id, depth) AS ("
+               "SELECT {pk}, 1 FROM {table} WHERE {parent} = %s "
+               "UNION ALL "
+               "SELECT t.{pk}, d.depth + 1 FROM {table} t "
+               "INNER JOIN descendants d ON t.{parent} = d.id "
+               "WHERE d.depth < %s) "
+               "SELECT t.*, d.depth AS tree_depth FROM {table} t "
+               "INNER JOIN descendants d ON t.{pk} = d.id "
+               "ORDER BY d.depth").format(**self._treeSQLNames())
+        return list(self.objects.raw(sql, [node.pk, self._MAX_DEPTH]))
+
+    def _getPathSeparator(self):
+        msg = "_getPathSeparator() must be defined in the subclass."
+        raise NotImplementedError(msg)
+
+    def _cleanDescendants(self, descendants):
+        """
+        Called with the descendants before their paths are saved, raise a
+        ValidationError to abort the update.
+        """
+        pass
+
+    def _update_descendants(self):
+        """
+        Rebuild the path of every descendant from this node's path in one
+        pass and save them with a bulk update.
+        """
+        model = type(self)
+
+        with transaction.atomic():
+            descendants = model.getDescendants(self)
+            self._cleanDescendants(descendants)
+            separator = self._getPathSeparator()
+            paths = {self.pk: self.path}
+
+            for node in descendants:
+                node.path = separator.join((
+                    paths[node.parent_id], getattr(node, self._PATH_FIELD)))
+                paths[node.pk] = node.path
+
+            model.objects.bulk_update(descendants, ['path'],
+                                      batch_size=self._BATCH_SIZE)
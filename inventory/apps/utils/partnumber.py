@@ -0,0 +1,252 @@
+#
+# utils/partnumber.py
+#
+# An index of part numbers that finds them by any part of their text.
+#
+# A part number is normalized to lower case letters and digits only, so
+# 'LM-317T' and 'lm317t' are the same. Every suffix of the normalized
+# number is stored as its own row, a substring of the part number is then
+# a prefix of one of its suffixes and is found with a range scan on an
+# ordinary index. The first three characters of each suffix are the part
+# number's trigrams, they are stored too and give a fuzzy match.
+#
+
+import re
+import math
+
+from django.apps import apps
+from django.db import models
+from django.db.models import Lookup
+from django.db.models.lookups import In
+
+from .models import PendingUpdates
+
+NORMALIZE_RE = re.compile(r'[^0-9a-z]+')
+# Normalized part numbers only contain these characters, in the order every
+# database collation sorts them.
+ALPHABET = '0123456789abcdefghijklmnopqrstuvwxyz'
+TRIGRAM_LENGTH = 3
+
+
+def normalize(text):
+    """
+    Return a part number in lower case with everything but the letters and
+    digits removed.
+    """
+    return NORMALIZE_RE.sub('', (text or '').casefold())
+
+
+def suffixes(text):
+    number = normalize(text)
+    return [number[idx:] for idx in range(len(number))]
+
+
+def trigrams(text):
+    number = normalize(text)
+    return sorted({number[idx:idx + TRIGRAM_LENGTH]
+                   for idx in range(len(number) - TRIGRAM_LENGTH + 1)})
+
+
+def prefixRange(prefix):
+    """
+    Return the lower and upper bounds of the normalized strings that start
+    with 'prefix', the upper bound is None if there is none.
+    """
+    chars = list(prefix)
+
+    while chars:
+        idx = ALPHABET.index(chars[-1]) + 1
+
+        if idx < len(ALPHABET):
+            chars[-1] = ALPHABET[idx]
+            return prefix, ''.join(chars)
+
+        chars.pop()
+
+    return prefix, None
+
+
+class PartNumberIndex(models.Model):
+    """
+    The base of a part number index. A subclass adds a foreign key to the
+    indexed model and sets FIELDS, the names of the indexed columns of that
+    model, the position of a column in FIELDS is what 'field' holds.
+    """
+    FIELDS = ()
+    SIMILARITY = 0.5
+    _BATCH_SIZE = 500
+    field = models.SmallIntegerField()
+    suffix = models.CharField(max_length=50)
+    trigram = models.CharField(max_length=TRIGRAM_LENGTH)
+
+    @classmethod
+    def _sourceField(self):
+        """
+        Return the foreign key to the indexed model.
+        """
+        for field in self._meta.get_fields():
+            if field.many_to_one:
+                return field
+
+        raise NotImplementedError(
+            "A foreign key to the indexed model must be defined in the "
+            "subclass.")
+
+    @classmethod
+    def buildEntries(self, record):
+        """
+        Return the unsaved index rows of 'record'.
+        """
+        fk = self._sourceField()
+        entries = []
+
+        for code, name in enumerate(self.FIELDS):
+            for suffix in suffixes(getattr(record, name)):
+                entries.append(self(**{
+                    fk.name: record, 'field': code, 'suffix': suffix,
+                    'trigram': suffix[:TRIGRAM_LENGTH]}))
+
+        return entries
+
+    @classmethod
+    def update(self, pks):
+        """
+        Rebuild the index rows of the records with the primary keys in
+        'pks'.
+        """
+        fk = self._sourceField()
+        model = fk.related_model
+        pks = list(pks)
+
+        for idx in range(0, len(pks), self._BATCH_SIZE):
+            batch = pks[idx:idx + self._BATCH_SIZE]
+            records = model._base_manager.filter(pk__in=batch).only(
+                *self.FIELDS)
+            entries = []
+
+            for record in records:
+                entries += self.buildEntries(record)
+
+            self.objects.filter(**{f"{fk.name}__in": batch}).delete()
+            self.objects.bulk_create(entries, batch_size=self._BATCH_SIZE)
+
+    @classmethod
+    def scheduleUpdate(self, pks):
+        """
+        Rebuild the index rows of the records with the primary keys in
+        'pks' when the current transaction commits.
+        """
+        PendingUpdates.add(self.update, pks)
+
+    @classmethod
+    def rebuild(self):
+        """
+        Rebuild the index rows of every record.
+        """
+        model = self._sourceField().related_model
+        self.update(model._base_manager.order_by('pk').values_list(
+            'pk', flat=True))
+
+    @classmethod
+    def containing(self, name, text):
+        """
+        Return the primary keys of the records whose 'name' column contains
+        'text' as a queryset to use with __in.
+        """
+        fk = self._sourceField()
+        low, high = prefixRange(normalize(text))
+        queryset = self.objects.filter(field=self.FIELDS.index(name),
+                                       suffix__gte=low)
+
+        if high is not None:
+            queryset = queryset.filter(suffix__lt=high)
+
+        return queryset.values(fk.attname)
+
+    @classmethod
+    def similarTo(self, name, text, similarity=None):
+        """
+        Return the primary keys of the records whose 'name' column shares
+        at least 'similarity' of its trigrams with 'text' as a queryset to
+        use with __in. Text shorter than a trigram is matched as a
+        substring.
+        """
+        grams = trigrams(text)
+
+        if not grams:
+            return self.containing(name, text)
+
+        fk = self._sourceField()
+        similarity = self.SIMILARITY if similarity is None else similarity
+        needed = max(1, math.ceil(len(grams) * similarity))
+        return self.objects.filter(
+            field=self.FIELDS.index(name), trigram__in=grams).values(
+            fk.attname).annotate(
+            matched=models.Count('trigram', distinct=True)).filter(
+            matched__gte=needed).values(fk.attname)
+
+    def __str__(self):
+        return self.suffix
+
+    class Meta:
+        abstract = True
+
+
+class PartNumberField(models.CharField):
+    """
+    A CharField that can be searched through a PartNumberIndex with the
+    'partnumber' (substring) and 'partnumber_similar' (fuzzy) lookups.
+
+    :param str index: The index model as 'app_label.ModelName'.
+    """
+
+    def __init__(self, *args, index=None, **kwargs):
+        self.index = index
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['index'] = self.index
+        return name, path, args, kwargs
+
+    def getIndex(self):
+        return apps.get_model(self.index)
+
+
+class _PartNumberLookup(Lookup):
+    prepare_rhs = False
+
+    def _pks(self, index, name):
+        raise NotImplementedError("The _pks() method must be defined in the "
+                                  "subclass.")
+
+    def as_sql(self, compiler, connection):
+        field = self.lhs.target
+        text = self.rhs
+
+        if not normalize(text):
+            # Nothing in the index to match, search the column as before.
+            lookup = field.get_lookup('icontains')(self.lhs, text)
+            return compiler.compile(lookup)
+
+        pk = field.model._meta.pk.get_col(self.lhs.alias)
+        pks = self._pks(field.getIndex(), field.name)
+        return compiler.compile(In(pk, pks.query))
+
+
+class PartNumberContains(_PartNumberLookup):
+    lookup_name = 'partnumber'
+
+    def _pks(self, index, name):
+        return index.containing(name, self.rhs)
+
+
+class PartNumberSimilar(_PartNumberLookup):
+    lookup_name = 'partnumber_similar'
+
+    def _pks(self, index, name):
+        return index.similarTo(name, self.rhs)
+
+
+PartNumberField.register_lookup(PartNumberContains)
+PartNumberField.register_lookup(PartNumberSimilar)
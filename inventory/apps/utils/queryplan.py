@@ -0,0 +1,234 @@
+#
+# utils/queryplan.py
+#
+# Builds the Q objects used by the searches.
+#
+
+import time
+import threading
+
+from django.conf import settings
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.db.models import Q
+
+from inventory.setupenv import getLogger
+
+from .exceptions import QueryBudgetExceeded
+
+log = getLogger()
+
+
+class QueryStep:
+    """
+    One predicate in a query plan.
+    """
+    ICONTAINS = 'icontains'
+    EXACT = 'exact'
+    LTE = 'lte'
+    GTE = 'gte'
+    CHECK_BOX = 'check_box'
+    FULLTEXT = 'fulltext'
+    PARTNUMBER = 'partnumber'
+    PARTNUMBER_SIMILAR = 'partnumber_similar'
+    # The order a form key is looked up in the field maps.
+    PRECEDENCE = (ICONTAINS, EXACT, LTE, GTE, CHECK_BOX, FULLTEXT, PARTNUMBER,
+                  PARTNUMBER_SIMILAR)
+    # Within the same rank exact matches are applied before indexed
+    # matches, indexed matches before ranges, ranges before substrings and
+    # substrings before the flags.
+    KIND_ORDER = (EXACT, PARTNUMBER, PARTNUMBER_SIMILAR, FULLTEXT, LTE, GTE,
+                  ICONTAINS, CHECK_BOX)
+    # The user is matched on more than one column.
+    USER_FIELDS = ('user__username', 'user__first_name', 'user__last_name')
+
+    def __init__(self, key, field, kind, rank):
+        self.key = key
+        self.field = field
+        self.kind = kind
+        self.rank = rank
+
+    @property
+    def sortKey(self):
+        return (self.rank, self.KIND_ORDER.index(self.kind), self.key)
+
+    def lookups(self):
+        if self.kind == self.ICONTAINS and self.key == 'user':
+            return [f"{field}__icontains" for field in self.USER_FIELDS]
+        elif self.kind == self.CHECK_BOX:
+            return [self.field]
+
+        return [f"{self.field}__{self.kind}"]
+
+    def bind(self, value):
+        q = Q()
+
+        for lookup in self.lookups():
+            q |= Q(**{lookup: value})
+
+        return q
+
+    def __str__(self):
+        return " | ".join(self.lookups())
+
+
+class QueryPlan:
+    """
+    An ordered list of QuerySteps, the most selective first. A plan only
+    depends on which form fields were filled in, so one plan is reused by
+    every search on the same fields.
+    """
+
+    def __init__(self, steps):
+        self.steps = tuple(sorted(steps, key=lambda step: step.sortKey))
+        self.uses = 0
+        self.totalTime = 0.0
+
+    def bind(self, values):
+        """
+        Build the Q object from a dict of form values keyed the same as the
+        steps.
+        """
+        query = Q()
+
+        for step in self.steps:
+            query &= step.bind(values[step.key])
+
+        self.uses += 1
+        return query
+
+    def hasKind(self, kind):
+        return any(step.kind == kind for step in self.steps)
+
+    def describe(self):
+        """
+        Return a list of the lookups in the order they are applied.
+        """
+        return [str(step) for step in self.steps]
+
+    def explain(self, queryset, values):
+        """
+        Return the database's plan for this query plan bound to 'values'.
+        """
+        return queryset.filter(self.bind(values)).explain()
+
+    def measure(self, queryset):
+        """
+        Evaluate a queryset built from this plan and record how long it
+        took.
+
+        :returns: A tuple of the records as a list and the elapsed seconds.
+        """
+        start = time.perf_counter()
+        records = list(queryset)
+        elapsed = time.perf_counter() - start
+        self.totalTime += elapsed
+        return records, elapsed
+
+    def __str__(self):
+        return " & ".join(f"({desc})" for desc in self.describe())
+
+
+class QueryPlanner:
+    """
+    Creates and caches QueryPlans from the field maps of a search class.
+    """
+    DEFAULT_RANK = 10
+
+    def __init__(self, fieldMaps, selectivity=None):
+        """
+        QueryPlanner constructor.
+
+        :param dict fieldMaps: Maps a QueryStep kind to a dict of form keys
+                               and model field names.
+        :param dict selectivity: Maps form keys to a rank, the lower the
+                                 rank the earlier the predicate is applied.
+        """
+        self._fieldMaps = fieldMaps
+        self._selectivity = selectivity or {}
+        self._plans = {}
+        self._lock = threading.Lock()
+
+    def getPlan(self, keys):
+        """
+        Return the plan for a set of form keys, keys that are not searchable
+        are ignored.
+        """
+        keys = frozenset(keys)
+
+        with self._lock:
+            plan = self._plans.get(keys)
+
+            if plan is None:
+                plan = self._plans[keys] = self._buildPlan(keys)
+                log.debug("New query plan for %s: %s", sorted(keys), plan)
+
+        return plan
+
+    def _buildPlan(self, keys):
+        steps = []
+
+        for key in keys:
+            for kind in QueryStep.PRECEDENCE:
+                field = self._fieldMaps.get(kind, {}).get(key)
+
+                if field is not None:
+                    rank = self._selectivity.get(key, self.DEFAULT_RANK)
+                    steps.append(QueryStep(key, field, kind, rank))
+                    break
+
+        return QueryPlan(steps)
+
+    @property
+    def plans(self):
+        return dict(self._plans)
+
+
+class QueryBudget:
+    """
+    Counts the queries run inside a with block and complains if there are
+    more than 'limit'. A warning is logged unless the QUERY_BUDGET_STRICT
+    setting is on, then QueryBudgetExceeded is raised.
+
+    with QueryBudget("item search", 2):
+        rows = [populate(record) for record in queryset]
+    """
+
+    def __init__(self, name, limit, using=DEFAULT_DB_ALIAS):
+        """
+        QueryBudget constructor.
+
+        :param str name: A name for the log message.
+        :param int limit: The most queries allowed, None for no limit.
+        :param str using: The database alias to count the queries on.
+        """
+        self.name = name
+        self.limit = limit
+        self.count = 0
+        self._using = using
+        self._wrapper = None
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self.count = 0
+        self._wrapper = connections[self._using].execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._wrapper.__exit__(exc_type, exc_value, traceback)
+        self._wrapper = None
+
+        if (exc_type is None and self.limit is not None
+                and self.count > self.limit):
+            msg = (f"{self.name} ran {self.count} queries, its budget is "
+                   f"{self.limit}.")
+
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(msg)
+
+            log.warning(msg)
+
+        return False
@@ -2,29 +2,69 @@
 # utils/search.py
 #
 
-from django.http import HttpResponse
+import secrets
+
+from django.http import HttpResponse, StreamingHttpResponse
 from django.template import loader
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from django.utils.safestring import mark_safe
 from django.utils.html import escape
 from django.template.context_processors import csrf
-
-from inventory.apps.items.models import Item, Distributor, Manufacturer
-from .views import ViewBase
+from django.db.models import Prefetch
+
+from inventory.common.caching import TaggedCache
+from inventory.apps.items.models import (
+    Item, Category, Cost, Specification, ItemSearchIndex, Distributor,
+    Manufacturer)
+from inventory.apps.maintenance.models import LocationCodeCategory
+from inventory.apps.regions.models import Country, Region
+from .views import ViewBase, DebugDump
+from .queryplan import QueryPlanner, QueryStep, QueryBudget
 from .searchforms import (
-    FindChoices, ItemSearchForm, DistributorSearchForm, ManufacturerSearchForm)
-from inventory.settings import SITE_NAME
+    ItemSearchForm, DistributorSearchForm, ManufacturerSearchForm)
+from inventory.settings import (
+    SITE_NAME, SEARCH_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE,
+    SEARCH_STREAM_CHUNK_SIZE)
 
 
 class SearchBase(ViewBase):
+    # Maps the CGI arguments to a rank, lower ranks are applied first.
+    _SELECTIVITY = {}
+    # CGI arguments used by the pager that are not part of the search.
+    _PAGER_ARGS = ('csrfmiddlewaretoken', 'after', 'page_size', 'stream')
+    # The most queries allowed to fetch and populate one page of records.
+    _QUERY_BUDGET = None
+    # Maps the CGI arguments to full text index fields.
+    _FULLTEXT = {}
+    # Maps the CGI arguments to part number fields, see utils.partnumber.
+    _PARTNUMBER = {}
+    # The models the results are built from, a page of results is cached
+    # until one of them changes. Nothing is cached if this is empty.
+    _CACHE_MODELS = ()
+    _CACHE = TaggedCache('searches')
 
     def __init__(self, log, referringPage, action, purge=False, crumbData=()):
-        self._log = log
+        super().__init__(log)
         self._referringPage = referringPage
         self._action = action
         self._purge = purge
         self._crumbData = crumbData
+        fieldMaps = {
+            QueryStep.ICONTAINS: self._ICONTAINS,
+            QueryStep.EXACT: self._EXACT,
+            QueryStep.LTE: self._LESS_THAN_EQUAL,
+            QueryStep.GTE: self._GREATER_THAN_EQUAL,
+            QueryStep.CHECK_BOX: self._CHECK_BOX,
+            QueryStep.FULLTEXT: self._FULLTEXT,
+            QueryStep.PARTNUMBER: self._PARTNUMBER}
+        self._planner = QueryPlanner(fieldMaps, self._SELECTIVITY)
+        # The same searches with the part numbers matched by similarity,
+        # used when none contain the part numbers searched for.
+        fieldMaps = dict(fieldMaps)
+        fieldMaps[QueryStep.PARTNUMBER_SIMILAR] = fieldMaps.pop(
+            QueryStep.PARTNUMBER)
+        self._similarPlanner = QueryPlanner(fieldMaps, self._SELECTIVITY)
 
     @method_decorator(login_required(redirect_field_name='/login/'))
     def __call__(self, request, *args, **kwargs):
@@ -46,20 +86,44 @@ class SearchBase(ViewBase):
             form = self._getSearchForm(data=request.POST)
 
             if form.is_valid():
-                query = self._buildQuery(form)
-                records = self._getRecords(query)
-                self._log.debug("records: %s", records)
+                plan, query = self._buildQuery(form)
+                queryset = self._getRecords(query).order_by('pk')
                 context['title'] = referTitle
 
-                if records:
-                    context['records'] = []
+                if request.POST.get('stream'):
+                    similar = self._getSimilar(form, plan, queryset)
 
-                    for record in records:
-                        context['records'].append(self._populateRow(record))
+                    if similar is not None:
+                        plan, queryset = similar
 
                     self._setBreadcrumb(request, referTitle, "")
-                    self._log.debug("Context dump for %s: %s",
-                                    self.__module__, context)
+                    return self._streamRecords(context, queryset)
+
+                pageSize = self._getPageSize(request)
+                after = self._getAfter(request)
+                rows, nextPk = self._getPage(request, plan, queryset,
+                                             pageSize, after)
+
+                if not rows:
+                    similar = self._getSimilar(form, plan, queryset)
+
+                    if similar is not None:
+                        plan, queryset = similar
+                        rows, nextPk = self._getPage(request, plan, queryset,
+                                                     pageSize, after)
+                        context['message'] = (
+                            "No exact part number matches, showing similar "
+                            "part numbers")
+
+                if rows:
+                    context['records'] = rows
+                    context['pager'] = {
+                        'page_size': pageSize,
+                        'next': nextPk,
+                        'params': self._getPagerParams(request)}
+                    context.update(csrf(request))
+                    self._setBreadcrumb(request, referTitle, "")
+                    self._dumpContext(context)
                     tmpl = loader.get_template(self._referringPage)
                     return HttpResponse(tmpl.render(context))
                 else:
@@ -77,13 +141,104 @@ class SearchBase(ViewBase):
 
         context['form'] = form
         context.update(csrf(request))
-        self._log.debug("Context dump for %s: %s", self.__module__, context)
+        self._dumpContext(context)
         tmpl = loader.get_template(self._getSearchHTML())
         return HttpResponse(tmpl.render(context))
 
-    def _getChoice(self, field, value):
-        msg = "_getChoice() must be defined in the subclass."
-        raise NotImplementedError(msg)
+    def _getPage(self, request, plan, queryset, pageSize, after=0):
+        """
+        Return the rows of one page of records after the primary key
+        'after' and the primary key to continue after or None if this is
+        the last page. The page is cached for the user and the query until
+        one of _CACHE_MODELS changes.
+        """
+        if after:
+            queryset = queryset.filter(pk__gt=after)
+
+        def producer():
+            with QueryBudget(self.__class__.__name__, self._QUERY_BUDGET):
+                records, elapsed = plan.measure(queryset[:pageSize + 1])
+                more = len(records) > pageSize
+                records = records[:pageSize]
+                rows = [self._populateRow(record) for record in records]
+
+            self._log.debug("records: %s, plan: %s, time: %0.4f",
+                            DebugDump(records), plan, elapsed)
+            return rows, more and records[-1].pk or None
+
+        if not self._CACHE_MODELS:
+            return producer()
+
+        params = sorted((key, request.POST.getlist(key))
+                        for key in request.POST
+                        if key not in ('csrfmiddlewaretoken', 'stream'))
+        key = self._CACHE.makeKey(
+            request.user.pk, self.__class__.__name__, self._referringPage,
+            self._purge, params, pageSize, str(plan))
+        tags = [TaggedCache.modelTag(model) for model in self._CACHE_MODELS]
+        return self._CACHE.getOrSet(key, producer, tags)
+
+    def _getSimilar(self, form, plan, queryset):
+        """
+        Return the plan and records of the search with its part numbers
+        matched by similarity, or None if the search has no part numbers
+        or some records contain them.
+        """
+        if not plan.hasKind(QueryStep.PARTNUMBER) or queryset.exists():
+            return None
+
+        plan, query = self._buildQuery(form, self._similarPlanner)
+        return plan, self._getRecords(query).order_by('pk')
+
+    def _getPageSize(self, request):
+        try:
+            pageSize = int(request.POST.get('page_size', SEARCH_PAGE_SIZE))
+        except ValueError:
+            pageSize = SEARCH_PAGE_SIZE
+
+        return min(max(pageSize, 1), SEARCH_MAX_PAGE_SIZE)
+
+    def _getAfter(self, request):
+        try:
+            return int(request.POST.get('after', 0))
+        except ValueError:
+            return 0
+
+    def _getPagerParams(self, request):
+        """
+        Return the search arguments as a list of (name, value) tuples so
+        that the next page can repeat the same search.
+        """
+        return [(key, value) for key, values in request.POST.lists()
+                if key not in self._PAGER_ARGS
+                for value in values]
+
+    def _streamRecords(self, context, queryset):
+        """
+        Return all the records as a streaming response. The page is
+        rendered once with a marker in place of the table rows, the rows
+        are then rendered one at a time between the two halves of the page
+        as the records are read from the database.
+        """
+        marker = secrets.token_hex(16)
+        context['stream_marker'] = marker
+        tmpl = loader.get_template(self._referringPage)
+        head, tail = tmpl.render(context).split(marker, 1)
+        rowTmpl = loader.get_template(self._getRowHTML())
+
+        def render():
+            yield head
+
+            for record in queryset.iterator(
+                    chunk_size=SEARCH_STREAM_CHUNK_SIZE):
+                yield rowTmpl.render({'record': self._populateRow(record)})
+
+            yield tail
+
+        return StreamingHttpResponse(render())
+
+    def _getRowHTML(self):
+        return self._referringPage.replace("List.html", "Row.html")
 
     def _getRecords(self, query):
         msg = "_getRecords() must be defined in the subclass."
@@ -101,58 +256,28 @@ class SearchBase(ViewBase):
         msg = "_populateRow() must be defined in the subclass."
         raise NotImplementedError(msg)
 
-    def _buildQuery(self, form):
-        query = []
+    def _buildQuery(self, form, planner=None):
+        values = {}
 
         for key, value in form.cleaned_data.items():
             # self._log.debug("key: %s, value: %s", key, value)
-            if value in ('', '', None):
+            if value in ('', None):
                 continue
 
-            if key in self._ICONTAINS:
-                field = self._ICONTAINS[key]
-
-                if key == 'user':
-                    code = (f"(Q(user__username__icontains='{value}') |"
-                            f" Q(user__first_name__icontains='{value}') |"
-                            f" Q(user__last_name__icontains='{value}'))")
-                else:
-                    code = f"Q({field}__icontains='{value}')"
-            elif key in self._EXACT:
-                field = self._EXACT[key]
-                choice = self._getChoice(field, value)
-                code = f"Q({field}__exact='{choice}')"
-            elif key in self._LESS_THAN_EQUAL:
-                field = self._LESS_THAN_EQUAL[key]
-                code = f"Q({field}__lte={value})"
-            elif key in self._GREATER_THAN_EQUAL:
-                field = self._GREATER_THAN_EQUAL[key]
-                code = f"Q({field}__gte={value})"
-            elif key in self._CHECK_BOX:
-                field = self._CHECK_BOX[key]
-
-                if self._purge and field == 'purge':
-                    code = f"Q({field}=True)"
-                else:
-                    code = f"Q({field}={value})"
-
-            query.append(code)
-
-        result = ' & '.join(query)
-        self._log.debug("query: %s", result)
+            if self._purge and self._CHECK_BOX.get(key) == 'purge':
+                value = True
 
-        if result:
-            result = eval(result)
+            values[key] = value
 
-        return result
+        plan = (planner or self._planner).getPlan(values)
+        query = plan.bind(values)
+        self._log.debug("query: %s", query)
+        return plan, query
 
 
 class ItemSearch(SearchBase):
     # These class member objects map the CGI arguments to DB column names.
-    _ICONTAINS = {'user': 'user', 'title': 'title',
-                  'item_number': 'item_number',
-                  'item_number_dst': 'item_number_dst',
-                  'item_number_mfg': 'item_number_mfg'}
+    _ICONTAINS = {'user': 'user', 'title': 'title'}
     _EXACT = {'package': 'package', 'location_code': 'location_code__path',
               'categories': 'categories__path',
               'distributor': 'distributor__name',
@@ -162,12 +287,28 @@ class ItemSearch(SearchBase):
     _CHECK_BOX = {'active': 'active',
                   'obsolete': 'obsolete',
                   'purge': 'purge'}
+    _FULLTEXT = {'keywords': 'search_index__document'}
+    _PARTNUMBER = {'item_number': 'item_number',
+                   'item_number_dst': 'item_number_dst',
+                   'item_number_mfg': 'item_number_mfg'}
+    _SELECTIVITY = {'item_number': 0, 'keywords': 1, 'item_number_mfg': 1,
+                    'item_number_dst': 1, 'distributor': 2,
+                    'manufacturer': 2, 'location_code': 3, 'categories': 3}
+    # One query for the items and one for all their categories.
+    _QUERY_BUDGET = 2
+    _CACHE_MODELS = (Item, Category, LocationCodeCategory, Distributor,
+                     Manufacturer, Cost, Specification, ItemSearchIndex)
+    # The columns used by _populateRow().
+    _ROW_FIELDS = ('title', 'item_number', 'quantity')
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
     def _getRecords(self, query):
-        return Item.objects.filter(query)
+        categories = Category.objects.only('pk', 'path')
+        records = Item.objects.filter(query).only(*self._ROW_FIELDS)
+        return records.prefetch_related(
+            Prefetch('categories', queryset=categories))
 
     def _getSearchForm(self, data=None):
         return ItemSearchForm(data=data)
@@ -185,23 +326,6 @@ class ItemSearch(SearchBase):
             escape(cat.path) for cat in record.categories.all()]))
         return data
 
-    def _getChoice(self, field, value):
-        obj, sep, attr = field.partition('__')
-
-        if obj == "categories":
-            choiceMap = dict(FindChoices.findCategoryFieldList(
-                attr, defaultOption=False))
-        elif obj == "location_code":
-            choiceMap = dict(FindChoices.findLocationCodeCategoryFieldList(
-                attr, defaultOption=False))
-        else:
-            choiceMap = dict(FindChoices.findItemFieldList(
-                field, defaultOption=False))
-
-        self._log.debug("field: %s, value: %s, choiceMap: %s",
-                        field, value, choiceMap)
-        return choiceMap.get(int(value), '')
-
 
 class BusinessSearchBase(SearchBase):
     _ICONTAINS = {'user': 'user', 'address_01': 'address_01',
@@ -213,6 +337,9 @@ class BusinessSearchBase(SearchBase):
     _LESS_THAN_EQUAL = {}
     _GREATER_THAN_EQUAL = {}
     _CHECK_BOX = {}
+    _SELECTIVITY = {'name': 0, 'postal_code': 1, 'country': 2}
+    # The country and state are joined, so one query for the whole page.
+    _QUERY_BUDGET = 1
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -235,44 +362,36 @@ class BusinessSearchBase(SearchBase):
 
 
 class DistributorSearch(BusinessSearchBase):
+    _CACHE_MODELS = (Distributor, Country, Region)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
     def _getRecords(self, query):
+        records = Distributor.objects.select_related('country', 'state')
+
         if query:
-            return Distributor.objects.filter(query)
+            records = records.filter(query)
 
-        return Distributor.objects.all()
+        return records
 
     def _getSearchForm(self, data=None):
         return DistributorSearchForm(data=data)
 
-    def _getChoice(self, field, value):
-        choiceMap = dict(FindChoices.findDistributorFieldList(
-            field, defaultOption=False))
-        self._log.debug("field: %s, value: %s, choiceMap: %s",
-                        field, value, choiceMap)
-        return choiceMap.get(int(value), '')
-
 
 class ManufacturerSearch(BusinessSearchBase):
+    _CACHE_MODELS = (Manufacturer, Country, Region)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
     def _getRecords(self, query):
+        records = Manufacturer.objects.select_related('country', 'state')
+
         if query:
-            return Manufacturer.objects.filter(query)
+            records = records.filter(query)
 
-        return Manufacturer.objects.all()
+        return records
 
     def _getSearchForm(self, data=None):
         return ManufacturerSearchForm(data=data)
-
-    def _getChoice(self, field, value):
-        choiceMap = dict(FindChoices.findManufacturerFieldList(
-            field, defaultOption=False))
-        self._log.debug("field: %s, value: %s, choiceMap: %s",
-                        field, value, choiceMap)
-        return choiceMap.get(int(value), '')
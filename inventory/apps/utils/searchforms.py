@@ -2,128 +2,134 @@
 # utils/searchforms.py
 #
 
+from functools import partial
+
 from django import forms
 
 from inventory.apps.items.models import (
     Item, Category, Distributor, Manufacturer)
 from inventory.apps.maintenance.models import LocationCodeCategory
+from inventory.common.caching import searchChoicesCache
 
 
 class FindChoices(object):
     """
     This class finds the choices for form fields.
 
-    *** TODO ***
-    These class methods are doing full table scans which will
-    become an issue as the database grows.
+    The distinct values are found by the database and cached per model,
+    the cache is cleared when one of the models the values come from is
+    saved or deleted (see the receivers in items/models.py).
     """
     @classmethod
     def findCategoryFieldList(self, field, defaultOption=True,
                               optionName="Category"):
-        records = Category.objects.all()
         return FindChoices._findFieldList(
-            records, field, defaultOption=defaultOption, optionName=optionName)
+            Category, field, defaultOption=defaultOption,
+            optionName=optionName)
 
     @classmethod
     def findItemFieldList(self, field, defaultOption=True, optionName=""):
-        records = Item.objects.all()
         return FindChoices._findFieldList(
-            records, field, defaultOption=defaultOption, optionName=optionName)
+            Item, field, defaultOption=defaultOption, optionName=optionName)
 
     @classmethod
     def findLocationCodeCategoryFieldList(self, field, defaultOption=True,
                                           optionName="Location Code"):
-        records = LocationCodeCategory.objects.all()
         return FindChoices._findFieldList(
-            records, field, defaultOption=defaultOption, optionName=optionName)
+            LocationCodeCategory, field, defaultOption=defaultOption,
+            optionName=optionName)
 
     @classmethod
     def findDistributorFieldList(self, field, defaultOption=True,
                                  optionName=""):
-        records = Distributor.objects.all()
         return FindChoices._findFieldList(
-            records, field, defaultOption=defaultOption, optionName=optionName)
+            Distributor, field, defaultOption=defaultOption,
+            optionName=optionName)
 
     @classmethod
     def findManufacturerFieldList(self, field, defaultOption=True,
                                   optionName=""):
-        records = Manufacturer.objects.all()
         return FindChoices._findFieldList(
-            records, field, defaultOption=defaultOption, optionName=optionName)
+            Manufacturer, field, defaultOption=defaultOption,
+            optionName=optionName)
 
     @classmethod
-    def _findFieldList(self, records, field, defaultOption=True,
+    def _findFieldList(self, model, field, defaultOption=True,
                        optionName=""):
-        if not len(field) or not isinstance(field, str):
+        if not isinstance(field, str) or not len(field):
             msg = ("Invalid field value and type can only be a 'str' or "
                    "'unicode'.")
             raise TypeError(msg)
 
-        field = field.replace('__', '.')
-        obj, sep, attr = field.partition('.')
+        obj, sep, attr = field.partition('__')
 
         if defaultOption:
             if optionName:
                 name = optionName
             else:
                 name = ' '.join([n.capitalize() for n in obj.split('_')])
-                # log.debug("field: %s, tmp: %s, name: %s", field, tmp, name)
 
-            result = [(0, "Choose a %s" % name)]
+            result = [('', "Choose a %s" % name)]
         else:
             result = []
 
-        valueMap = {}
-
-        if records:
-            for record in records:
-                fieldPath = '.'.join(["record", obj])
-
-                if attr and hasattr(eval(fieldPath), attr):
-                    fieldPath += ".%s" % attr
-
-                # log.debug("fieldPath: %s", fieldPath)
-                value = eval(fieldPath)
-
-                if value:
-                    valueMap[str(value)] = None
-
-            values = list(valueMap.keys())
-            values.sort()
-            # log.debug("values: %s", values)
-            idx = 1
+        result.extend(searchChoicesCache(model).getOrSet(
+            field, lambda: FindChoices._findValues(model, field)))
+        return result
 
-            for value in values:
-                result.append((idx, value.strip()))
-                idx += 1
+    @classmethod
+    def _findValues(self, model, field):
+        """
+        Return the sorted distinct values of 'field' using one query. The
+        key of each choice is the value itself so that a submitted form can
+        be used to filter directly. A relation is keyed by the primary key
+        of the related object and shown as its string.
+        """
+        modelField = None
+        obj, sep, attr = field.partition('__')
+
+        if not attr:
+            modelField = model._meta.get_field(obj)
+
+        if modelField and modelField.is_relation:
+            records = modelField.related_model.objects.filter(
+                pk__in=model.objects.values(obj)).order_by()
+            values = [(record.pk, str(record)) for record in records]
+        else:
+            records = model.objects.values_list(
+                field, flat=True).distinct().order_by()
+            values = [(str(record), str(record))
+                      for record in records if record]
 
-        return result
+        values.sort(key=lambda value: value[1])
+        return [(key, label.strip()) for key, label in values]
 
 
 class ItemSearchForm(forms.Form):
     user = forms.CharField(max_length=50, required=False)
     title = forms.CharField(max_length=20, required=False)
+    keywords = forms.CharField(max_length=100, required=False)
     item_number = forms.CharField(max_length=20, required=False)
     item_number_dst = forms.CharField(max_length=20, required=False)
     item_number_mfg = forms.CharField(max_length=20, required=False)
     package = forms.ChoiceField(
-        choices=FindChoices.findItemFieldList('package'),
+        choices=partial(FindChoices.findItemFieldList, 'package'),
         required=False,
         widget=forms.Select())
     location_code = forms.ChoiceField(
-        choices=FindChoices.findLocationCodeCategoryFieldList('path'),
+        choices=partial(FindChoices.findLocationCodeCategoryFieldList, 'path'),
         required=False,
         widget=forms.Select())
     categories = forms.ChoiceField(
-        choices=FindChoices.findCategoryFieldList('path'),
+        choices=partial(FindChoices.findCategoryFieldList, 'path'),
         required=False,
         widget=forms.Select())
     distributor = forms.ChoiceField(
-        choices=FindChoices.findItemFieldList('distributor__name'),
+        choices=partial(FindChoices.findItemFieldList, 'distributor__name'),
         required=False,
         widget=forms.Select())
     manufacturer = forms.ChoiceField(
-        choices=FindChoices.findItemFieldList('manufacturer__name'),
+        choices=partial(FindChoices.findItemFieldList, 'manufacturer__name'),
         required=False,
         widget=forms.Select())
     quantity = forms.IntegerField(required=False)
@@ -138,9 +144,8 @@ class ItemSearchForm(forms.Form):
             if not isinstance(value, str):
                 continue
 
-            # This sets the select boxes defaults to "not set".
-            if (value.isdigit() and int(value) == 0
-                or value.strip() in ('', None)):
+            # This sets blank values to "not set".
+            if value.strip() == '':
                 self.cleaned_data[key] = ''
 
         if not any(self.cleaned_data.values()):
@@ -152,7 +157,7 @@ class ItemSearchForm(forms.Form):
 class DistributorSearchForm(forms.Form):
     user = forms.CharField(max_length=50, required=False)
     name = forms.ChoiceField(
-        choices=FindChoices.findDistributorFieldList('name'),
+        choices=partial(FindChoices.findDistributorFieldList, 'name'),
         required=False,
         widget=forms.Select())
     address_01 = forms.CharField(max_length=50, required=False)
@@ -160,11 +165,11 @@ class DistributorSearchForm(forms.Form):
     city = forms.CharField(max_length=30, required=False)
     state = forms.CharField(max_length=2, required=False)
     postal_code = forms.ChoiceField(
-        choices=FindChoices.findDistributorFieldList('postal_code'),
+        choices=partial(FindChoices.findDistributorFieldList, 'postal_code'),
         required=False,
         widget=forms.Select())
     country = forms.ChoiceField(
-        choices=FindChoices.findDistributorFieldList('country'),
+        choices=partial(FindChoices.findDistributorFieldList, 'country'),
         required=False,
         widget=forms.Select())
     phone = forms.CharField(max_length=20, required=False)
@@ -179,9 +184,8 @@ class DistributorSearchForm(forms.Form):
             if not isinstance(value, str):
                 continue
 
-            # This sets the select boxes defaults to "not set".
-            if (value.isdigit() and int(value) == 0
-                or value.strip() in ('', None)):
+            # This sets blank values to "not set".
+            if value.strip() == '':
                 self.cleaned_data[key] = ''
 
         return self.cleaned_data
@@ -190,7 +194,7 @@ class DistributorSearchForm(forms.Form):
 class ManufacturerSearchForm(forms.Form):
     user = forms.CharField(max_length=50, required=False)
     name = forms.ChoiceField(
-        choices=FindChoices.findManufacturerFieldList('name'),
+        choices=partial(FindChoices.findManufacturerFieldList, 'name'),
         required=False,
         widget=forms.Select())
     address_01 = forms.CharField(max_length=50, required=False)
@@ -198,11 +202,11 @@ class ManufacturerSearchForm(forms.Form):
     city = forms.CharField(max_length=30, required=False)
     state = forms.CharField(max_length=2, required=False)
     postal_code = forms.ChoiceField(
-        choices=FindChoices.findManufacturerFieldList('postal_code'),
+        choices=partial(FindChoices.findManufacturerFieldList, 'postal_code'),
         required=False,
         widget=forms.Select())
     country = forms.ChoiceField(
-        choices=FindChoices.findManufacturerFieldList('country'),
+        choices=partial(FindChoices.findManufacturerFieldList, 'country'),
         required=False,
         widget=forms.Select())
     phone = forms.CharField(max_length=20, required=False)
@@ -217,9 +221,8 @@ class ManufacturerSearchForm(forms.Form):
             if not isinstance(value, str):
                 continue
 
-            # This sets the select boxes defaults to "not set".
-            if (value.isdigit() and int(value) == 0
-                or value.strip() in ('', None)):
+            # This sets blank values to "not set".
+            if value.strip() == '':
                 self.cleaned_data[key] = ''
 
         return self.cleaned_data
@@ -0,0 +1,34 @@
+#
+# utils/settings.py
+#
+# Django settings for the utils app.
+#
+
+# The number of records shown on one page of search results.
+SEARCH_PAGE_SIZE = 100
+# The largest page size a user can ask for.
+SEARCH_MAX_PAGE_SIZE = 1000
+# The number of records read from the database at a time when all the
+# search results are streamed.
+SEARCH_STREAM_CHUNK_SIZE = 500
+# Raise QueryBudgetExceeded instead of logging a warning when a view runs
+# more queries than its budget, turn this on when running the tests.
+QUERY_BUDGET_STRICT = False
+# Admin changelists on tables with more rows than this, by the database's
+# own estimate, show an estimated count instead of running COUNT(*).
+ADMIN_ESTIMATE_THRESHOLD = 10000
+# The most rows counted for a filtered changelist on such a table.
+ADMIN_COUNT_LIMIT = 10000
+# Seconds the rendered reports and search results are kept in the tagged
+# cache, they are dropped sooner when a model they were built from changes.
+TAGGED_CACHE_TIMEOUT = 600
+# The most pages kept in the breadcrumb trail in the session.
+BREADCRUMB_LIMIT = 10
+# The views, by class name, that log their context at DEBUG level, '*' for
+# every view. Dumps are off by default because they are expensive.
+DEBUG_DUMP_VIEWS = ()
+# Log one in this many context dumps of each view.
+DEBUG_DUMP_SAMPLE = 1
+# The most items of a collection and characters of a value in a dump.
+DEBUG_DUMP_MAX_ITEMS = 10
+DEBUG_DUMP_MAX_LENGTH = 200
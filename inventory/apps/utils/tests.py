@@ -0,0 +1,307 @@
+#
+# utils/tests.py
+#
+
+import io
+import os
+import logging
+import tempfile
+import contextlib
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.core.cache import cache
+from django.contrib.auth.models import User
+
+from inventory.apps.items.admin import DistributorAdmin
+from inventory.apps.items.models import (
+    Item, Category, Distributor, Manufacturer)
+from inventory.apps.regions.models import Country, Region
+from inventory.apps.utils.loghandler import NewTimedRotatingFileHandler
+from inventory.apps.utils.utilities import parseMeasurement
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class SearchQueryBudgetTest(TestCase):
+    """
+    A page of search results must be fetched within the search's query
+    budget no matter how many records are on it, QueryBudgetExceeded is
+    raised by the view if it is not.
+    """
+
+    @classmethod
+    def setUpTestData(self):
+        self.user = User.objects.create_user('tester', password='tester')
+        country = Country.objects.create(
+            country="United States", country_code_2='US', user=self.user)
+        category = Category.objects.create(name="Resistors", parent=None,
+                                           user=self.user)
+
+        for idx in range(3):
+            region = Region.objects.create(
+                country=country, region_code=f"US-{idx}",
+                region=f"State {idx}", user=self.user)
+            business = {'name': f"Business {idx}", 'city': "Springfield",
+                        'state': region, 'country': country,
+                        'user': self.user}
+            distributor = Distributor.objects.create(**business)
+            manufacturer = Manufacturer.objects.create(**business)
+            item = Item.objects.create(
+                title=f"Resistor {idx}", item_number=f"R-{idx}",
+                distributor=distributor, manufacturer=manufacturer,
+                user=self.user)
+            item.categories.add(category)
+
+    def setUp(self):
+        # A cached page would not run any queries.
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def _search(self, url, data):
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_item_search(self):
+        response = self._search('/reports/view_item/',
+                                {'title': "resistor", 'active': 'on'})
+        self.assertContains(response, "Resistor 2")
+
+    def test_distributor_search(self):
+        response = self._search('/reports/view_distributor/',
+                                {'city': "springfield"})
+        self.assertContains(response, "Business 2")
+
+    def test_manufacturer_search(self):
+        response = self._search('/reports/view_manufacturer/',
+                                {'city': "springfield"})
+        self.assertContains(response, "Business 2")
+
+
+class SimilarPartNumberSearchTest(TestCase):
+
+    @classmethod
+    def setUpTestData(self):
+        self.user = User.objects.create_user('tester', password='tester')
+
+        # The part number index is built when the transaction commits.
+        with self.captureOnCommitCallbacks(execute=True):
+            for number in ("LM317T", "NE555P"):
+                Item.objects.create(title=f"Regulator {number}",
+                                    item_number=number, user=self.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_exact_part_number(self):
+        response = self.client.post('/reports/view_item/', {
+            'item_number': "lm-317", 'active': 'on'})
+        self.assertContains(response, "LM317T")
+        self.assertNotContains(response, "similar part numbers")
+
+    def test_similar_part_number(self):
+        response = self.client.post('/reports/view_item/', {
+            'item_number': "LM318T", 'active': 'on'})
+        self.assertContains(response, "LM317T")
+        self.assertNotContains(response, "NE555P")
+        self.assertContains(response, "similar part numbers")
+
+
+class ParseMeasurementTest(SimpleTestCase):
+
+    def test_measurements(self):
+        for value, number in (("10000", "10000"), ("10k", "10000"),
+                              ("10 kOhm", "10000"), ("4k7", "4700"),
+                              ("4R7", "4.7"), ("4.7uF", "0.0000047"),
+                              ("100 nF", "0.0000001"), ("1/4W", "0.25"),
+                              (".5 mm", "0.0005"), ("2.2M", "2200000"),
+                              ("33pF", "0.000000000033")):
+            with self.subTest(value=value):
+                self.assertEqual(parseMeasurement(value), Decimal(number))
+
+    def test_not_measurements(self):
+        for value in (None, "", "SOT-23", "TO-220", "4.7k7", "1/0", "k",
+                      "10 k 10"):
+            with self.subTest(value=value):
+                self.assertIsNone(parseMeasurement(value))
+
+
+@mock.patch.object(DistributorAdmin, 'list_per_page', 2)
+class CursorChangeListTest(TestCase):
+    """
+    The admin changelist with EstimatedCountPaginator and CursorChangeList.
+    """
+    URL = '/admin/items/distributor/'
+
+    @classmethod
+    def setUpTestData(self):
+        self.user = User.objects.create_superuser('tester', password='tester')
+
+        for idx in range(5):
+            Distributor.objects.create(name=f"Business {idx}", city=(
+                "Springfield" if idx % 2 else "Shelbyville"), user=self.user)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _changelist(self, url=URL, data=None):
+        response = self.client.get(url, data)
+        self.assertEqual(response.status_code, 200)
+        return response.context['cl']
+
+    def _names(self, cl):
+        return [obj.name for obj in cl.result_list]
+
+    def test_exact_count(self):
+        cl = self._changelist()
+        self.assertFalse(cl.count_estimated)
+        self.assertEqual(cl.result_count, 5)
+        self.assertIsNone(cl.exact_count_url)
+
+    @mock.patch('inventory.apps.utils.admin.estimateRowCount',
+                return_value=500000)
+    def test_estimated_count(self, estimate):
+        cl = self._changelist()
+        self.assertTrue(cl.count_estimated)
+        self.assertEqual(cl.result_count, 500000)
+        self.assertIn('exact_count=1', cl.exact_count_url)
+
+        cl = self._changelist(data={'exact_count': 1})
+        self.assertFalse(cl.count_estimated)
+        self.assertEqual(cl.result_count, 5)
+
+    @mock.patch('inventory.apps.utils.admin.ADMIN_COUNT_LIMIT', 2)
+    @mock.patch('inventory.apps.utils.admin.estimateRowCount',
+                return_value=500000)
+    def test_filtered_count_limit(self, estimate):
+        # Only two of the three matches are counted.
+        cl = self._changelist(data={'city': "Shelbyville"})
+        self.assertTrue(cl.count_estimated)
+        self.assertEqual(cl.result_count, 2)
+
+    def test_next_and_previous_page(self):
+        cl = self._changelist()
+        self.assertTrue(cl.cursor_paging)
+        self.assertEqual(self._names(cl), ["Business 0", "Business 1"])
+        self.assertIsNone(cl.first_page_url)
+        self.assertIsNone(cl.previous_cursor_url)
+
+        cl = self._changelist(self.URL + cl.next_cursor_url)
+        self.assertEqual(self._names(cl), ["Business 2", "Business 3"])
+        self.assertIsNotNone(cl.first_page_url)
+        previous = cl.previous_cursor_url
+
+        cl = self._changelist(self.URL + cl.next_cursor_url)
+        self.assertEqual(self._names(cl), ["Business 4"])
+        self.assertIsNone(cl.next_cursor_url)
+
+        cl = self._changelist(self.URL + cl.previous_cursor_url)
+        self.assertEqual(self._names(cl), ["Business 2", "Business 3"])
+
+        cl = self._changelist(self.URL + previous)
+        self.assertEqual(self._names(cl), ["Business 0", "Business 1"])
+        self.assertIsNone(cl.previous_cursor_url)
+        self.assertIsNotNone(cl.next_cursor_url)
+
+    def test_descending_order(self):
+        cl = self._changelist(data={'o': '-1'})
+        self.assertEqual(self._names(cl), ["Business 4", "Business 3"])
+        cl = self._changelist(self.URL + cl.next_cursor_url)
+        self.assertEqual(self._names(cl), ["Business 2", "Business 1"])
+        cl = self._changelist(self.URL + cl.previous_cursor_url)
+        self.assertEqual(self._names(cl), ["Business 4", "Business 3"])
+
+    def test_bad_cursor(self):
+        response = self.client.get(self.URL, {'cursor': "bad"})
+        self.assertEqual(response.status_code, 302)
+
+
+class NewTimedRotatingFileHandlerTest(SimpleTestCase):
+    """
+    Two handlers on the same file stand in for two Apache workers, the
+    clock is set by the test so the rollover boundary is crossed exactly.
+    """
+    START = 1700000000
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.path = tmpdir.name
+        self.filename = os.path.join(self.path, 'inventory.log')
+        self.now = self.START
+        patcher = mock.patch('time.time', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.handlers = [self._handler() for idx in range(2)]
+
+    def _handler(self):
+        handler = NewTimedRotatingFileHandler(
+            os.path.join(self.path, 'rollover.json'), self.filename,
+            when='s', interval=10)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        self.addCleanup(handler.close)
+        return handler
+
+    def _emit(self, handler, msg):
+        handler.handle(logging.makeLogRecord({'msg': msg}))
+
+    def _read(self, filename):
+        with open(os.path.join(self.path, filename)) as fobj:
+            return fobj.read().splitlines()
+
+    def test_one_rollover(self):
+        first, second = self.handlers
+        before = []
+        after = []
+
+        for idx in range(2):
+            before.append(f"before {idx}")
+            self._emit(self.handlers[idx], before[-1])
+
+        self.now = first.rolloverAt
+
+        with contextlib.redirect_stderr(io.StringIO()) as stderr:
+            for idx in range(4):
+                after.append(f"after {idx}")
+                self._emit(self.handlers[idx % 2], after[-1])
+
+        self.assertEqual(stderr.getvalue().count("Rolled over"), 1)
+        self.assertEqual(first.rolloverAt, self.now + 10)
+        self.assertEqual(second.rolloverAt, first.rolloverAt)
+        self.assertEqual(first.getPersistentData(), {
+            'rolloverAt': self.now + 10, 'lastRoll': self.now})
+
+        rotated = [name for name in os.listdir(self.path)
+                   if name.startswith('inventory.log.')]
+        self.assertEqual(len(rotated), 1)
+        self.assertEqual(self._read(rotated[0]), before)
+        self.assertEqual(self._read('inventory.log'), after)
+
+    def test_idle_handler(self):
+        first, second = self.handlers
+        self._emit(first, "a0")
+        self._emit(second, "b0")
+
+        with contextlib.redirect_stderr(io.StringIO()):
+            # The second handler rotates the first period's file then the
+            # first handler, idle for two periods, rotates the second's.
+            self.now = second.rolloverAt
+            self._emit(second, "b1")
+            self.now += 20
+            self._emit(first, "a2")
+            self._emit(second, "b2")
+
+        backups = sorted(name for name in os.listdir(self.path)
+                         if name.startswith('inventory.log.'))
+        self.assertEqual([self._read(name) for name in backups],
+                         [["a0", "b0"], ["b1"]])
+        self.assertEqual(self._read('inventory.log'), ["a2", "b2"])
+        self.assertEqual(first.rolloverAt, self.now + 10)
+        self.assertEqual(second.rolloverAt, first.rolloverAt)
+
+    def test_restart_keeps_rollover_time(self):
+        rolloverAt = self.handlers[0].rolloverAt
+        self.now += 3
+        self.assertEqual(self._handler().rolloverAt, rolloverAt)
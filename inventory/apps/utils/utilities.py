@@ -3,6 +3,8 @@
 #
 
 import re
+import functools
+from decimal import Decimal, InvalidOperation
 
 
 class FormatParser(object):
@@ -29,6 +31,8 @@ class FormatParser(object):
         ')': r'\)',
         }
 
+    __GROUP_PREFIX = 'fmt'
+
     def __init__(self, formats, delimiter):
         """
         FormatParser constructor.
@@ -37,17 +41,34 @@ class FormatParser(object):
                             language can parse.
         :param str delimiter: The delimiter used between formats.
         """
-        self.__formats = formats
+        self.__formats = tuple(formats)
         self.__delimiter = delimiter
-        self.__currentFormat = None
         self.__fmtRegEx = self.__buildRegEx()
 
+    @classmethod
+    def getParser(self, formats, delimiter):
+        """
+        Return a parser for the formats and delimiter, parsers are compiled
+        once and shared.
+
+        :param str formats: A sequence of various formats that this mini
+                            language can parse.
+        :param str delimiter: The delimiter used between formats.
+        :returns: A FormatParser instance.
+        """
+        return _cachedParser(tuple(formats), delimiter)
+
     def __buildRegEx(self):
+        """
+        Build one regex with a named group for each format. The formats are
+        tried in order and the name of the group that matched is the index
+        of the format.
+        """
         splitRegEx = r"""(\\[adp]|[a-zA-Z%s])""" % \
                      self.__removeDelimiter(self.__FMT_MAP.get(r'\p')[1:-1])
         result = []
 
-        for fmt in self.__formats:
+        for idx, fmt in enumerate(self.__formats):
             segList = [x for x in re.split(splitRegEx, fmt) if x]
             regex = ''
 
@@ -57,12 +78,17 @@ class FormatParser(object):
                 if tmp:
                     regex += self.__removeDelimiter(tmp)
                 else:
-                    regex += self.__removeDelimiter(seg)
+                    # Literals must be escaped, they share the regex with
+                    # the other formats.
+                    for c in self.__delimiter:
+                        seg = seg.replace(c, '')
 
-            regex = "(" + regex + ")"
-            result.append(re.compile(regex))
+                    regex += re.escape(seg)
 
-        return result
+            result.append(f"(?P<{self.__GROUP_PREFIX}{idx}>{regex})")
+
+        # An empty alternation would match everything.
+        return re.compile('|'.join(result) if result else r'(?!)')
 
     def __removeDelimiter(self, value):
         for c in self.__delimiter:
@@ -73,20 +99,11 @@ class FormatParser(object):
 
         return value
 
-    def validate(self, value):
-        result = None
-        count = -1
+    def __match(self, value):
+        return self.__fmtRegEx.fullmatch(value)
 
-        for fmt in self.__fmtRegEx:
-            count += 1
-            match = fmt.search(value)
-
-            if match:
-                result = match.group(0)
-                self.__currentFormat = count
-                break
-
-        return result is not None
+    def validate(self, value):
+        return self.__match(value) is not None
 
     def getFormat(self, value):
         """
@@ -96,23 +113,71 @@ class FormatParser(object):
         @return: The valid character definition matching a Location Code
                  Default.
         """
-        result = None
+        match = self.__match(value)
 
-        if self.validate(value) and self.__currentFormat is not None:
-            result = self.__formats[self.__currentFormat]
-        else:
-            msg = (f"Invalid value [{value}] or format "
-                   f"[{self.__currentFormat}].")
+        if match is None:
+            msg = (f"Invalid value [{value}] for formats "
+                   f"[{', '.join(self.__formats)}].")
             raise ValueError(msg)
 
-        return result
+        return self.__formats[int(match.lastgroup[len(self.__GROUP_PREFIX):])]
+
+
+@functools.lru_cache(maxsize=32)
+def _cachedParser(formats, delimiter):
+    return FormatParser(formats, delimiter)
+
+
+_MEASUREMENT_RE = re.compile(
+    r"^\s*(?P<number>\d+(?:\.\d+)?|\.\d+)(?:/(?P<divisor>\d+))?\s*"
+    r"(?P<prefix>[pnuµμmkKMGR]?)(?P<fraction>\d*)\s*(?P<unit>[^\d\s]*)\s*$")
+_SI_PREFIXES = {
+    'p': Decimal('1e-12'), 'n': Decimal('1e-9'), 'u': Decimal('1e-6'),
+    'µ': Decimal('1e-6'), 'μ': Decimal('1e-6'), 'm': Decimal('1e-3'),
+    '': Decimal(1), 'R': Decimal(1), 'k': Decimal('1e3'), 'K': Decimal('1e3'),
+    'M': Decimal('1e6'), 'G': Decimal('1e9'),
+    }
+MEASUREMENT_PLACES = Decimal('1e-12')
+
+
+def parseMeasurement(value):
+    """
+    Convert a measurement written the way specifications are to a number
+    in the base unit, e.g. '10k' and '10 kOhm' become 10000, '4k7' (the
+    prefix as the decimal point) becomes 4700, '4.7uF' becomes 0.0000047
+    and '1/4W' becomes 0.25. The unit itself is dropped.
+
+    :param str value: The value to parse.
+    :returns: A Decimal rounded to 12 places or None if 'value' is not a
+              measurement.
+    """
+    match = _MEASUREMENT_RE.match(value or '')
+
+    if match is None:
+        return None
+
+    number, divisor, prefix, fraction, unit = match.group(
+        'number', 'divisor', 'prefix', 'fraction', 'unit')
+
+    if fraction and ('.' in number or divisor or not prefix):
+        return None
+
+    try:
+        result = Decimal(f"{number}.{fraction}" if fraction else number)
+
+        if divisor:
+            result /= Decimal(divisor)
+
+        return (result * _SI_PREFIXES[prefix]).quantize(MEASUREMENT_PLACES)
+    except (InvalidOperation, ZeroDivisionError):
+        return None
 
 
 if __name__ == "__main__":
     formats = (r"T\d\d", r"X\d\d", r"B\d\dR\d\dC\d\d", r"\a\p\d\d\d",
                r"0\d\p\p\p!A\a", r"TBD")
     delimiter = ':'
-    fp = FormatParser(formats, delimiter)
+    fp = FormatParser.getParser(formats, delimiter)
 
     for seq in ('T01', 'X55', 'B01R05C09', 'A!339', '01###!AQ', 'TBD'):
         print(f"Validate: {seq}, {fp.validate(seq)}")
@@ -2,11 +2,73 @@
 # utils/views.py
 #
 
+import logging
+import itertools
+
+from django.db.models import QuerySet
+
+from inventory.settings import (
+    BREADCRUMB_LIMIT, DEBUG_DUMP_VIEWS, DEBUG_DUMP_SAMPLE,
+    DEBUG_DUMP_MAX_ITEMS, DEBUG_DUMP_MAX_LENGTH)
+
+
+class DebugDump:
+    """
+    Formats a value for the debug log only when the message is actually
+    written. Collections are cut to DEBUG_DUMP_MAX_ITEMS items, strings
+    and anything else to DEBUG_DUMP_MAX_LENGTH characters and a queryset
+    that has not been evaluated is described instead of run.
+    """
+
+    def __init__(self, value, maxItems=DEBUG_DUMP_MAX_ITEMS,
+                 maxLength=DEBUG_DUMP_MAX_LENGTH):
+        self._value = value
+        self._maxItems = maxItems
+        self._maxLength = maxLength
+
+    def _truncate(self, text):
+        if len(text) > self._maxLength:
+            text = f"{text[:self._maxLength]}... ({len(text)} chars)"
+
+        return text
+
+    def _more(self, size):
+        return [f"... ({size - self._maxItems} more)"] if (
+            size > self._maxItems) else []
+
+    def _format(self, value, depth=0):
+        if depth > 2:
+            return self._truncate(repr(value))
+        elif isinstance(value, QuerySet):
+            if value._result_cache is None:
+                return f"<QuerySet {value.model.__name__} (not evaluated)>"
+
+            value = value._result_cache
+
+        if isinstance(value, dict):
+            items = [f"{key!r}: {self._format(val, depth + 1)}"
+                     for key, val in itertools.islice(
+                         value.items(), self._maxItems)]
+            items += self._more(len(value))
+            return "{" + ", ".join(items) + "}"
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            items = [self._format(val, depth + 1)
+                     for val in itertools.islice(value, self._maxItems)]
+            items += self._more(len(value))
+            return "[" + ", ".join(items) + "]"
+
+        return self._truncate(repr(value))
+
+    def __str__(self):
+        return self._format(self._value)
+
+
 class ViewBase:
     __CRUMBS_KEY = 'breadcrumbs'
 
     def __init__(self, log):
         self._log = log
+        self._dumpCount = itertools.count()
 
     # @classmethod
     # def getLocalizedNowDateTime(self):
@@ -44,28 +106,53 @@ class ViewBase:
     #     tmpl = loader.get_template('response.html')
     #     return tmpl.render(context)
 
+    def _isDumpEnabled(self):
+        """
+        Return True if this view's context dumps should be logged, see
+        DEBUG_DUMP_VIEWS.
+        """
+        return ((self.__class__.__name__ in DEBUG_DUMP_VIEWS
+                 or '*' in DEBUG_DUMP_VIEWS)
+                and self._log.isEnabledFor(logging.DEBUG))
+
+    def _dumpContext(self, context):
+        """
+        Log a summary of 'context' for one in every DEBUG_DUMP_SAMPLE calls
+        if dumps are enabled for this view, nothing is formatted otherwise.
+        """
+        if (self._isDumpEnabled()
+                and next(self._dumpCount) % max(DEBUG_DUMP_SAMPLE, 1) == 0):
+            self._log.debug("Context dump for %s: %s", self.__module__,
+                            DebugDump(context))
+
     def _setBreadcrumb(self, request, title, url):
-        page = (title, url)
+        """
+        Add a page to the breadcrumb trail in the session. Going back to a
+        page already in the trail drops the pages after it and the trail
+        keeps its first page and the most recent BREADCRUMB_LIMIT - 1
+        pages. The session is only written when the trail changes so
+        moving around pages already in the trail costs nothing.
+        """
+        # The session is serialized as JSON so the pages are stored as
+        # lists.
+        page = [title, url]
+        breadcrumbs = request.session.get(self.__CRUMBS_KEY) or []
         self._log.debug("Current page: %s", page)
 
-        try:
-            breadcrumbs = request.session[self.__CRUMBS_KEY]
-        except Exception:
-            breadcrumbs = []
-            request.session[self.__CRUMBS_KEY] = breadcrumbs
-            self._log.debug("Created %s object in session", self.__CRUMBS_KEY)
-
-        if page in breadcrumbs:
-            idx = breadcrumbs.index(page)
-            self._log.debug("Deleting pages: %s", breadcrumbs[idx + 1:])
-            del breadcrumbs[idx + 1:]
-            # Must copy the 'breadcrumb' list back into the session, because
-            # 'del' seems to create a new object for 'breadcrumbs'.
-            request.session[self.__CRUMBS_KEY] = breadcrumbs
+        for idx, crumb in enumerate(breadcrumbs):
+            if list(crumb) == page:
+                trail = breadcrumbs[:idx + 1]
+                break
         else:
-            breadcrumbs.append(page)
+            trail = breadcrumbs + [page]
+
+            if len(trail) > BREADCRUMB_LIMIT:
+                trail = trail[:1] + trail[1 - BREADCRUMB_LIMIT:]
+
+        if trail != breadcrumbs:
+            request.session[self.__CRUMBS_KEY] = trail
             self._log.debug("Saved %s to %s in session.",
-                            page, self.__CRUMBS_KEY)
+                            trail, self.__CRUMBS_KEY)
 
     def _getBreadcrumbs(self, request):
         result = request.session.get(self.__CRUMBS_KEY, [])
@@ -0,0 +1,296 @@
+#
+# common/caching.py
+#
+# Caching utilities shared by the inventory apps.
+#
+
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+
+from inventory.setupenv import getLogger
+from inventory.settings import TAGGED_CACHE_TIMEOUT
+
+log = getLogger()
+
+
+class ProcessCache:
+    """
+    A process local cache for data that is expensive to build and rarely
+    changes. Any process can invalidate it, the other processes notice a
+    bumped generation number kept in the configured Django cache and drop
+    their local copy. The shared generation is checked at most once every
+    'checkInterval' seconds so reads stay in memory. If 'maxSize' is set
+    the least recently used entries are dropped to stay within it.
+    """
+    __KEY_PREFIX = 'process-cache-generation'
+    __NAMED = {}
+    __NAMED_LOCK = threading.Lock()
+    CHECK_INTERVAL = 5
+
+    def __init__(self, name, checkInterval=CHECK_INTERVAL, maxSize=None):
+        """
+        ProcessCache constructor.
+
+        :param str name: The name of this cache, must be unique per project.
+        :param int checkInterval: Seconds between checks of the shared
+                                  generation number.
+        :param int maxSize: The most entries kept, None for no limit.
+        """
+        self._name = name
+        self._checkInterval = checkInterval
+        self._maxSize = maxSize
+        self._lock = threading.RLock()
+        self._data = OrderedDict()
+        self._generation = None
+        self._lastCheck = 0
+
+    @classmethod
+    def named(self, name):
+        """
+        Return the one ProcessCache in this process with this name,
+        creating it if necessary.
+        """
+        with self.__NAMED_LOCK:
+            if name not in self.__NAMED:
+                self.__NAMED[name] = self(name)
+
+            return self.__NAMED[name]
+
+    @property
+    def generation(self):
+        """
+        The shared generation number this process last saw, None if the
+        cache has never been invalidated.
+        """
+        with self._lock:
+            self._checkGeneration()
+            return self._generation
+
+    @property
+    def _generationKey(self):
+        return f"{self.__KEY_PREFIX}:{self._name}"
+
+    def _sharedGeneration(self):
+        try:
+            return cache.get(self._generationKey)
+        except Exception as e:
+            log.warning("Could not read cache generation for %s, %s",
+                        self._name, e)
+            return self._generation
+
+    def _checkGeneration(self):
+        now = time.monotonic()
+
+        if now - self._lastCheck < self._checkInterval:
+            return
+
+        self._lastCheck = now
+        generation = self._sharedGeneration()
+
+        if generation != self._generation:
+            self._data.clear()
+            self._generation = generation
+
+    def _store(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+
+        if self._maxSize is not None:
+            while len(self._data) > self._maxSize:
+                self._data.popitem(last=False)
+
+    def get(self, key, default=None):
+        with self._lock:
+            self._checkGeneration()
+
+            if key not in self._data:
+                return default
+
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._store(key, value)
+
+    def getOrSet(self, key, producer):
+        """
+        Return the value for 'key', calling 'producer()' to create it if it
+        is not already cached.
+        """
+        with self._lock:
+            self._checkGeneration()
+
+            if key in self._data:
+                self._data.move_to_end(key)
+            else:
+                self._store(key, producer())
+
+            return self._data[key]
+
+    def invalidate(self):
+        """
+        Drop the local data and tell all other processes to do the same.
+        """
+        with self._lock:
+            self._data.clear()
+            generation = time.time_ns()
+
+            try:
+                cache.set(self._generationKey, generation, None)
+            except Exception as e:
+                log.warning("Could not write cache generation for %s, %s",
+                            self._name, e)
+            else:
+                self._generation = generation
+
+            self._lastCheck = time.monotonic()
+
+
+def searchChoicesCache(model):
+    """
+    Return the ProcessCache holding the search form choices found from
+    'model'.
+    """
+    return ProcessCache.named(f"search-choices:{model._meta.label_lower}")
+
+
+class TaggedCache:
+    """
+    A cache in the configured Django cache whose entries are tagged with
+    the models they were built from. Each tag has a version number kept in
+    the cache and an entry is saved with the versions of its tags when it
+    was built, invalidating a tag bumps its version so every entry built
+    with the old version becomes a miss and expires on its own.
+
+    Models are watched with TaggedCache.watch(), their tags are then
+    invalidated when a row is saved or deleted or a many to many relation
+    changes, once the transaction commits.
+    """
+    __TAG_PREFIX = 'cache-tag'
+    __WATCHED = set()
+
+    def __init__(self, name, timeout=TAGGED_CACHE_TIMEOUT):
+        """
+        TaggedCache constructor.
+
+        :param str name: The name of this cache, must be unique per project.
+        :param int timeout: Seconds an entry is kept.
+        """
+        self._name = name
+        self._timeout = timeout
+
+    @classmethod
+    def modelTag(self, model):
+        return model._meta.label_lower
+
+    @classmethod
+    def _tagKey(self, tag):
+        return f"{self.__TAG_PREFIX}:{tag}"
+
+    def makeKey(self, *parts):
+        """
+        Return a cache key built from 'parts', e.g. the user and the query.
+        """
+        digest = hashlib.md5(repr(parts).encode('utf-8'),
+                             usedforsecurity=False).hexdigest()
+        return f"tagged:{self._name}:{digest}"
+
+    def _tagVersions(self, tags):
+        keys = {self._tagKey(tag): tag for tag in tags}
+        versions = cache.get_many(list(keys))
+
+        for key in keys:
+            if key not in versions:
+                # A tag never invalidated, or evicted, starts a new version.
+                cache.add(key, time.time_ns(), None)
+                versions[key] = cache.get(key)
+
+        return {keys[key]: version for key, version in versions.items()}
+
+    def getOrSet(self, key, producer, tags):
+        """
+        Return the value for 'key', calling 'producer()' to create it if it
+        is not cached or is out of date. The value must be picklable.
+
+        :param str key: A key from makeKey().
+        :param producer: A callable returning the value.
+        :param tags: The tags the value depends on, see modelTag().
+        """
+        try:
+            # The versions are read before the value is built, so a change
+            # committed while it is built leaves the new entry out of date.
+            versions = self._tagVersions(tags)
+            entry = cache.get(key)
+        except Exception as e:
+            log.warning("Could not read %s from cache %s, %s",
+                        key, self._name, e)
+            return producer()
+
+        if entry is not None and entry[0] == versions:
+            return entry[1]
+
+        value = producer()
+
+        try:
+            cache.set(key, (versions, value), self._timeout)
+        except Exception as e:
+            log.warning("Could not write %s to cache %s, %s",
+                        key, self._name, e)
+
+        return value
+
+    @classmethod
+    def invalidate(self, *tags):
+        """
+        Make every entry tagged with any of 'tags' a miss.
+        """
+        version = time.time_ns()
+
+        try:
+            cache.set_many({self._tagKey(tag): version for tag in tags},
+                           None)
+        except Exception as e:
+            log.warning("Could not invalidate cache tags %s, %s", tags, e)
+
+    @classmethod
+    def invalidateModels(self, *models):
+        """
+        Invalidate the tags of 'models' once the current transaction
+        commits, immediately if there is no transaction.
+        """
+        tags = [self.modelTag(model) for model in models]
+        transaction.on_commit(lambda: self.invalidate(*tags))
+
+    @classmethod
+    def watch(self, *models):
+        """
+        Invalidate the tags of 'models' whenever one of their rows is saved
+        or deleted or one of their many to many relations changes.
+        """
+        for model in models:
+            if model in self.__WATCHED:
+                continue
+
+            self.__WATCHED.add(model)
+            post_save.connect(_invalidateModelTag, sender=model)
+            post_delete.connect(_invalidateModelTag, sender=model)
+
+            for field in model._meta.local_many_to_many:
+                m2m_changed.connect(_invalidateRelationTags,
+                                    sender=field.remote_field.through)
+
+
+def _invalidateModelTag(sender, **kwargs):
+    TaggedCache.invalidateModels(sender)
+
+
+def _invalidateRelationTags(sender, instance, action, model, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        TaggedCache.invalidateModels(sender, type(instance), model)
@@ -0,0 +1,171 @@
+#
+# common/logqueue.py
+#
+# A non-blocking logging pipeline. The application's loggers only put
+# records on a bounded queue, a QueueListener thread writes them to the
+# real handlers in batches so a slow disk never holds up a request.
+#
+
+import queue
+import threading
+import logging
+import logging.handlers
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    A QueueHandler that never blocks. When the queue is full the record is
+    dropped and counted, the number dropped is logged as a warning once
+    the queue has room again.
+    """
+
+    def __init__(self, queue):
+        super().__init__(queue)
+        self._dropLock = threading.Lock()
+        self._pending = {}
+        self.dropped = {}
+
+    @property
+    def droppedTotal(self):
+        return sum(self.dropped.values())
+
+    def enqueue(self, record):
+        with self._dropLock:
+            pending = self._pending
+
+            if pending:
+                try:
+                    self.queue.put_nowait(self._dropRecord(pending))
+                except queue.Full:
+                    pass
+                else:
+                    self._pending = {}
+
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self._countDrop(record.levelname)
+
+    def _countDrop(self, level):
+        self.dropped[level] = self.dropped.get(level, 0) + 1
+        self._pending[level] = self._pending.get(level, 0) + 1
+
+    def _dropRecord(self, pending):
+        counts = ", ".join(f"{level}: {count}"
+                           for level, count in sorted(pending.items()))
+        return logging.LogRecord(
+            self.name or __name__, logging.WARNING, __file__, 0,
+            "The log queue was full, dropped %s records (%s)",
+            (sum(pending.values()), counts), None)
+
+
+class BatchFlushMixin:
+    """
+    Lets a BatchQueueListener write a batch of records to a stream handler
+    and flush the stream once for the whole batch.
+    """
+    _deferFlush = False
+
+    def startBatch(self):
+        self._deferFlush = True
+
+    def endBatch(self):
+        self._deferFlush = False
+        self.flush()
+
+    def flush(self):
+        if not self._deferFlush:
+            super().flush()
+
+
+class BatchRotatingFileHandler(BatchFlushMixin,
+                               logging.handlers.RotatingFileHandler):
+    pass
+
+
+class BatchQueueListener(logging.handlers.QueueListener):
+    """
+    A QueueListener that takes up to 'batchSize' records off the queue at a
+    time, handlers with the BatchFlushMixin are flushed once per batch.
+    """
+
+    def __init__(self, queue, *handlers, batchSize=100,
+                 respect_handler_level=True):
+        super().__init__(queue, *handlers,
+                         respect_handler_level=respect_handler_level)
+        self._batchSize = batchSize
+
+    def stop(self):
+        # Safe to call more than once, e.g. explicitly and again at exit.
+        if self._thread is not None:
+            super().stop()
+
+    def enqueue_sentinel(self):
+        # The queue may be full, wait for the thread to make room.
+        self.queue.put(self._sentinel)
+
+    def _nextBatch(self):
+        batch = [self.dequeue(True)]
+
+        while len(batch) < self._batchSize and batch[-1] is not self._sentinel:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch
+
+    def handleBatch(self, records):
+        batched = [handler for handler in self.handlers
+                   if isinstance(handler, BatchFlushMixin)]
+
+        for handler in batched:
+            handler.startBatch()
+
+        try:
+            for record in records:
+                self.handle(record)
+        finally:
+            for handler in batched:
+                handler.endBatch()
+
+    def _monitor(self):
+        hasTaskDone = hasattr(self.queue, 'task_done')
+        stopped = False
+
+        while not stopped:
+            batch = self._nextBatch()
+
+            if batch[-1] is self._sentinel:
+                stopped = True
+                records = batch[:-1]
+            else:
+                records = batch
+
+            try:
+                self.handleBatch(records)
+            finally:
+                if hasTaskDone:
+                    for record in batch:
+                        self.queue.task_done()
+
+
+def startQueueLogging(logger, handlers, maxSize=10000, batchSize=100):
+    """
+    Send the records of 'logger' through a bounded queue to 'handlers' on
+    a listener thread.
+
+    :param logger: The logger to attach the queue to.
+    :param list handlers: The handlers that write the records, they keep
+                          their own formatters and levels.
+    :param int maxSize: The most records waiting in the queue, more are
+                        dropped.
+    :param int batchSize: The most records written per flush.
+    :returns: The DroppingQueueHandler and the started BatchQueueListener.
+    """
+    records = queue.Queue(maxSize)
+    handler = DroppingQueueHandler(records)
+    listener = BatchQueueListener(records, *handlers, batchSize=batchSize)
+    listener.start()
+    logger.addHandler(handler)
+    return handler, listener
@@ -0,0 +1,29 @@
+#
+# common/middleware.py
+#
+# Middleware shared by the inventory apps.
+#
+
+from django.utils.cache import patch_cache_control
+
+
+class PrivateCacheMiddleware:
+    """
+    Marks every response to a logged in user as private so the site wide
+    UpdateCacheMiddleware only stores the public pages. The pages built
+    from the inventory are cached per user by common.caching.TaggedCache,
+    which is invalidated when the models they are built from change.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        user = getattr(request, 'user', None)
+
+        if (user is not None and user.is_authenticated
+                and 'public' not in response.get('Cache-Control', '')):
+            patch_cache_control(response, private=True)
+
+        return response
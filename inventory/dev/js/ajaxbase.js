@@ -71,11 +71,16 @@ AjaxBase.prototype = {
     this._setMessage(status);
   },
 
-  _callAjax: function(method, url, json, callback, dataType) {
+  _callAjax: function(method, url, json, callback, dataType, cache) {
     if(dataType == undefined) {
       var dataType = "json";
     }
 
+    // Pass true to let the browser revalidate a cached response.
+    if(cache == undefined) {
+      var cache = false;
+    }
+
     try {
       $.ajaxSetup({
         crossDomain: false, // Must use jquery >= 1.5.1
@@ -83,7 +88,7 @@ AjaxBase.prototype = {
       });
 
       $.ajax({url: url,
-              cache: false,
+              cache: cache,
               type: method,
               dataType: dataType,
               data: json,
@@ -13,11 +13,15 @@ var Purge = function() {
   this._setupSubmit();
   this._CONFIRM_REQUEST = null;
   this._DELETE_REQUEST = null;
+  this._job = null;
 };
 
 
 Purge.prototype = {
   _CONTACT_SERVER_TXT: "Wait while contacting the server...",
+  _POLL_INTERVAL: 2000, // 2 seconds
+  // Must match the status numbers in jobs/models.py
+  _JOB_DONE: 2,
 
   _setupSubmit: function() {
     this._CONFIRM_REQUEST = this._confirmationRequest.bind(this);
@@ -29,6 +33,7 @@ Purge.prototype = {
     $('input#reset').click(function () {
        this._setMessage("");
      }.bind(this));
+    $('input#cancel').click(this._cancelRequest.bind(this));
   },
 
   _confirmationRequest: function() {
@@ -53,18 +58,68 @@ Purge.prototype = {
 
   _deleteCB: function(json, status) {
     this._setMessage(json["message"]);
+    $('form#form').unbind('submit', this._DELETE_REQUEST);
+    $('form#form').bind('submit', this._CONFIRM_REQUEST);
 
     if(json['valid']) {
+      this._job = json['job'];
+      $('input#submit').attr('disabled', true);
+      $('input#cancel').show();
+      this._pollJob();
+    } else {
+      this._setMessage(true);
+    }
+  },
+
+  _pollJob: function() {
+    this._callAjax("get", this._assembleURI("/jobs/" + this._job + "/"),
+     {}, this._jobCB);
+  },
+
+  _jobCB: function(json, status) {
+    if(!json['valid']) {
+      this._finishJob(json['message']);
+      return;
+    }
+
+    var job = json['job'];
+
+    if(!job['finished']) {
+      this._setMessage("Deleted " + job['progress'] + " of " + job['total'] +
+                       " records...");
+      setTimeout(this._pollJob.bind(this), this._POLL_INTERVAL);
+    } else if(job['status'] == this._JOB_DONE) {
       $('td input[type=checkbox]').each(function() {
         if(this.checked) {
           $(this).parent().parent().remove();
         }
        });
+
+      this._finishJob("The selected records have been deleted.");
+    } else {
+      this._finishJob(job['status_name'] + ": " + job['message'] +
+                      " " + job['progress'] + " of " + job['total'] +
+                      " records were deleted, search again to see the " +
+                      "remaining records.");
     }
+  },
 
-    $('form#form').unbind('submit', this._DELETE_REQUEST);
-    $('form#form').bind('submit', this._CONFIRM_REQUEST);
-    this._setMessage(true);
+  _cancelRequest: function() {
+    if(this._job != null) {
+      this._callAjax("post", this._assembleURI(
+       "/jobs/" + this._job + "/cancel/"), {}, this._cancelCB);
+    }
+  },
+
+  _cancelCB: function(json, status) {
+    this._setMessage(json['message']);
+  },
+
+  _finishJob: function(message) {
+    this._job = null;
+    $('input#cancel').hide();
+    $('input#submit').attr('disabled', false);
+    this._setMessage(message);
   },
 
   _createJSON: function() {
@@ -31,8 +31,8 @@ Region.prototype = {
     //this._setMessage(this._CONTACT_SERVER_TXT);
     $('select#'+this._SELECT_ID).find('option:gt(0)').remove();
     $('select#'+this._SELECT_ID).find('option:eq(0)').remove();
-    this._callAjax("post", this._assembleURI("/lookup/regions/"),
-     this._createJSON(), this._regionCB);
+    this._callAjax("get", this._assembleURI("/lookup/regions/"),
+     this._createJSON(), this._regionCB, "json", true);
   },
 
   _regionCB: function(json, status) {
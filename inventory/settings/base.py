@@ -7,7 +7,9 @@
 import os
 from inventory.setupenv import *
 from inventory.apps.items.settings import *
+from inventory.apps.jobs.settings import *
 from inventory.apps.login.settings import *
+from inventory.apps.utils.settings import *
 
 
 DEBUG = False
@@ -118,12 +120,18 @@ MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Keeps the pages of logged in users out of the site wide cache.
+    'inventory.common.middleware.PrivateCacheMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     # Uncomment the next line for simple clickjacking protection:
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django.middleware.cache.FetchFromCacheMiddleware',  # This must be last
     ]
 
+# The site wide cache only holds public pages, see PrivateCacheMiddleware.
+CACHE_MIDDLEWARE_SECONDS = 600
+CACHE_MIDDLEWARE_KEY_PREFIX = 'site'
+
 CACHES = {
     'default': {
         'BACKEND': 'redis_cache.RedisCache',
@@ -174,6 +182,7 @@ INSTALLED_APPS = [
     'inventory.apps.login',
     # 'inventory.apps.reports',
     'inventory.apps.maintenance',
+    'inventory.apps.jobs',
     ]
 
 TEMPLATES = [
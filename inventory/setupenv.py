@@ -3,8 +3,12 @@
 #
 
 import os
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import threading
+
+from inventory.common.logqueue import (
+    BatchRotatingFileHandler, startQueueLogging)
 
 
 LOGGER_NAME = "inventory"
@@ -13,24 +17,54 @@ LOG_LEVEL = logging.DEBUG
 LOG_FILENAME = "inventory.log"
 BASE_PATH = os.path.realpath(os.path.join(os.path.dirname(__file__), ".."))
 LOG_PATH = BASE_PATH
+# The most log records waiting to be written, more are dropped and counted
+# instead of blocking the request.
+LOG_QUEUE_SIZE = 10000
+# The most log records written to the file per flush.
+LOG_BATCH_SIZE = 100
+
+_logLock = threading.Lock()
+_logPipeline = None
 
 
 def initializeLogging():
     """
-    Initialize the logger.
+    Initialize the logger. The records are put on a bounded queue and
+    written to the log file by a listener thread, see common.logqueue.
+    Only the first call does anything.
     """
-    logger = logging.getLogger(LOGGER_NAME)
-    logger.setLevel(LOG_LEVEL)
-    filename = os.path.join(LOG_PATH, 'logs', LOG_FILENAME)
-    handler = RotatingFileHandler(filename, 'a', 2000000, 9, None, True)
-    fmt = ("%(asctime)s %(module)s %(funcName)s [line:%(lineno)d]"
-           " %(levelname)s %(message)s")
-    formatter = logging.Formatter(fmt)
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
+    global _logPipeline
+
+    with _logLock:
+        if _logPipeline is not None:
+            return
+
+        logger = logging.getLogger(LOGGER_NAME)
+        logger.setLevel(LOG_LEVEL)
+        filename = os.path.join(LOG_PATH, 'logs', LOG_FILENAME)
+        handler = BatchRotatingFileHandler(filename, 'a', 2000000, 9, None,
+                                           True)
+        fmt = ("%(asctime)s %(module)s %(funcName)s [line:%(lineno)d]"
+               " %(levelname)s %(message)s")
+        formatter = logging.Formatter(fmt)
+        handler.setFormatter(formatter)
+        _logPipeline = startQueueLogging(
+            logger, [handler], maxSize=LOG_QUEUE_SIZE,
+            batchSize=LOG_BATCH_SIZE)
+        # Write what is still queued when the process exits.
+        atexit.register(_logPipeline[1].stop)
+
     logger.info("Logging is initialized for the %s application.", LOGGER_NAME)
 
 
+def getLogDrops():
+    """
+    Return the number of log records dropped because the queue was full,
+    keyed by level name.
+    """
+    return dict(_logPipeline[0].dropped) if _logPipeline else {}
+
+
 def getLogger(name: str=LOGGER_NAME):
     """
     Get the default logger or the named logger.
@@ -21,6 +21,7 @@ urlpatterns = [
     re_path(r'^login/', include('inventory.apps.login.urls')),
     re_path(r'^reports/', include('inventory.apps.reports.urls')),
     re_path(r'^maintenance/', include('inventory.apps.maintenance.urls')),
+    re_path(r'^jobs/', include('inventory.apps.jobs.urls')),
     ]
 
 if settings.DEBUG: